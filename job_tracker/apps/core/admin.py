@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import JobPlatform, TranslationCache, DocumentTemplate, MarketInsight, TranslationUsage
+from .models import JobPlatform, TranslationCache, DocumentTemplate, MarketInsight, TranslationUsage, DailyUsage
 
 
 @admin.register(JobPlatform)
 class JobPlatformAdmin(admin.ModelAdmin):
-    list_display = ['name', 'api_endpoint', 'rate_limit', 'is_active', 'created_at']
+    list_display = ['name', 'api_endpoint', 'rate_limit', 'poll_interval', 'next_poll_at', 'is_active', 'created_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'api_endpoint']
     readonly_fields = ['created_at', 'updated_at']
@@ -31,6 +31,7 @@ class MarketInsightAdmin(admin.ModelAdmin):
     list_display = ['skill', 'platform', 'demand_score', 'avg_salary', 'location', 'date_analyzed']
     list_filter = ['platform', 'location', 'date_analyzed']
     search_fields = ['skill', 'location']
+    list_select_related = ['platform']
     readonly_fields = ['date_analyzed']
 
 
@@ -39,3 +40,10 @@ class TranslationUsageAdmin(admin.ModelAdmin):
     list_display = ['service_name', 'character_count', 'cost', 'date']
     list_filter = ['service_name', 'date']
     readonly_fields = ['date']
+
+
+@admin.register(DailyUsage)
+class DailyUsageAdmin(admin.ModelAdmin):
+    list_display = ['service', 'date', 'calls', 'units', 'cost']
+    list_filter = ['service', 'date']
+    date_hierarchy = 'date'
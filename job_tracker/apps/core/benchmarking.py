@@ -0,0 +1,108 @@
+"""
+Local performance benchmark harness.
+
+Apps register workloads in a ``benchmarks`` module with the ``@benchmark``
+decorator. Each workload runs inside a transaction that is rolled back, so
+it can be pointed at a database filled by ``generate_synthetic_data``
+without changing it. Median timings are compared with the baselines stored
+in ``BENCHMARK_BASELINE_PATH``, which are recorded per machine with
+``benchmark --update-baseline`` (see ``benchmarks/README.md``).
+"""
+import json
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import autodiscover_modules
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[], Optional[int]]
+    repeat: int
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    median_ms: float
+    min_ms: float
+    max_ms: float
+    items_per_second: Optional[float] = None
+
+
+_registry: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, repeat: int = 5) -> Callable:
+    """
+    Register a workload under ``name``.
+
+    The function may return the number of items it processed, in which case
+    the result also reports a throughput.
+    """
+    def decorator(func: Callable[[], Optional[int]]) -> Callable[[], Optional[int]]:
+        _registry[name] = Benchmark(name=name, func=func, repeat=repeat)
+        return func
+    return decorator
+
+
+def registered() -> dict[str, Benchmark]:
+    autodiscover_modules('benchmarks')
+    return dict(sorted(_registry.items()))
+
+
+def _timed(func: Callable[[], Optional[int]]) -> tuple[float, Optional[int]]:
+    with transaction.atomic():
+        start = time.perf_counter()
+        items = func()
+        elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return elapsed, items
+
+
+def run(item: Benchmark, repeat: Optional[int] = None) -> BenchmarkResult:
+    """Run one warm-up and ``repeat`` measured iterations of ``item``"""
+    _timed(item.func)
+    timings, items = [], None
+    for _ in range(repeat or item.repeat):
+        elapsed, items = _timed(item.func)
+        timings.append(elapsed * 1000)
+
+    median = statistics.median(timings)
+    return BenchmarkResult(
+        name=item.name,
+        median_ms=round(median, 3),
+        min_ms=round(min(timings), 3),
+        max_ms=round(max(timings), 3),
+        items_per_second=round(items / (median / 1000), 1) if items and median else None,
+    )
+
+
+def load_baselines() -> dict[str, dict]:
+    path = Path(settings.BENCHMARK_BASELINE_PATH)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baselines(results: list[BenchmarkResult]) -> None:
+    path = Path(settings.BENCHMARK_BASELINE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    baselines = load_baselines()
+    baselines.update({result.name: asdict(result) for result in results})
+    path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+
+
+def regression(result: BenchmarkResult, baselines: dict[str, dict], threshold: float) -> Optional[float]:
+    """Return the relative slowdown if it exceeds ``threshold``"""
+    baseline = baselines.get(result.name)
+    if not baseline or not baseline['median_ms']:
+        return None
+    slowdown = result.median_ms / baseline['median_ms'] - 1
+    return slowdown if slowdown > threshold else None
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from apps.core.benchmarking import benchmark
+from apps.core.factories import SKILLS
+from apps.jobs.models import Job
+
+
+@benchmark('market_insights')
+def market_insights() -> int:
+    """Skill demand and salary per platform over the last 30 days of jobs"""
+    recent = Job.objects.filter(posted_date__gte=timezone.now() - timedelta(days=30))
+    aggregates = {}
+    for index, skill in enumerate(SKILLS):
+        aggregates[f'skill_{index}_count'] = Count('id', filter=Q(requirements__icontains=skill))
+        aggregates[f'skill_{index}_salary'] = Avg('salary_max', filter=Q(requirements__icontains=skill))
+    rows = list(recent.values('platform_id', 'location').annotate(**aggregates))
+    return len(rows)
@@ -0,0 +1,62 @@
+"""
+factory-boy factories for core models and shared bilingual fake data.
+
+Every factory that produces text takes its language from the instance being
+built, so German and English rows come out of the same factory.
+"""
+import random
+
+import factory
+import factory.random
+from factory.django import DjangoModelFactory
+from faker import Faker
+
+from apps.core.models import DocumentTemplate, JobPlatform
+
+LANGUAGES = ['en', 'de']
+
+SKILLS = [
+    'Python', 'Django', 'PostgreSQL', 'Celery', 'Redis', 'Docker', 'Kubernetes',
+    'React', 'TypeScript', 'AWS', 'GCP', 'Terraform', 'SQL', 'Pandas', 'Machine Learning',
+    'REST', 'GraphQL', 'Linux', 'CI/CD', 'Scrum', 'SAP', 'Java', 'Go', 'Rust',
+]
+
+PLATFORMS = ['linkedin', 'xing', 'stepstone', 'indeed']
+
+_fakers = {'en': Faker('en_US'), 'de': Faker('de_DE')}
+
+
+def faker_for(language: str) -> Faker:
+    """Return the Faker instance generating text in ``language``"""
+    return _fakers[language]
+
+
+def reseed(seed: int) -> None:
+    """Make factory-generated data reproducible"""
+    random.seed(seed)
+    factory.random.reseed_random(seed)
+    Faker.seed(seed)
+
+
+def random_skills(count: int = 5) -> list[str]:
+    return random.sample(SKILLS, count)
+
+
+class JobPlatformFactory(DjangoModelFactory):
+    class Meta:
+        model = JobPlatform
+        django_get_or_create = ('name',)
+
+    name = factory.Iterator(PLATFORMS)
+    api_endpoint = factory.LazyAttribute(lambda o: f'https://api.{o.name}.example/v1/jobs')
+    api_key = factory.Faker('sha256')
+
+
+class DocumentTemplateFactory(DjangoModelFactory):
+    class Meta:
+        model = DocumentTemplate
+
+    name = factory.Sequence(lambda n: f'Template {n}')
+    template_type = factory.Iterator(['cv', 'cover_letter'])
+    language = factory.Iterator(LANGUAGES)
+    content = factory.LazyAttribute(lambda o: faker_for(o.language).text(max_nb_chars=2000))
@@ -0,0 +1,260 @@
+"""
+Query and latency instrumentation for requests and Celery tasks.
+
+Every unit of work (an HTTP request or a Celery task) is wrapped in a
+``QueryRecorder`` that counts queries, sums DB time and groups queries by
+shape. Shapes repeated more than ``N_PLUS_ONE_THRESHOLD`` times are reported
+as likely N+1 patterns. Samples are aggregated in Redis so web and worker
+processes share one Prometheus exposition served by the ``metrics`` view.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+
+import redis
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('apps.core.instrumentation.slow')
+
+METRICS_KEY = 'metrics:jobtracker'
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_FAMILIES = {
+    'jobtracker_runs_total': ('counter', 'Requests or tasks executed'),
+    'jobtracker_run_duration_seconds': ('histogram', 'Wall-clock duration of requests or tasks'),
+    'jobtracker_db_queries_total': ('counter', 'Database queries executed'),
+    'jobtracker_db_duration_seconds_total': ('counter', 'Time spent in database queries'),
+    'jobtracker_n_plus_one_total': ('counter', 'Runs that repeated one query shape above the threshold'),
+}
+
+# Runs older than this whose task_postrun never arrived are dropped
+TASK_RUN_TTL = 6 * 60 * 60
+
+_unavailable_until = 0.0  # monotonic time before which samples are dropped
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s(?:, )?)+\)')
+_LE_RE = re.compile(r',?le="([^"]*)"')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql: str) -> str:
+    """Reduce a parametrised statement to its shape"""
+    return _WHITESPACE_RE.sub(' ', _IN_LIST_RE.sub('IN (...)', sql)).strip()
+
+
+class QueryRecorder:
+    """Database execute wrapper collecting query count, time and shapes"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[normalize_sql(sql)] += 1
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        """Return SELECT shapes executed at least ``threshold`` times"""
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= threshold and shape.upper().startswith('SELECT')
+        ]
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """Record queries on every configured database for the enclosed block"""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name: str, labels: dict) -> str:
+    rendered = ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return f'{name}{{{rendered}}}'
+
+
+def report(kind: str, name: str, duration: float, recorder: QueryRecorder) -> None:
+    """Export one finished run to the metrics store and the slow/N+1 logs"""
+    labels = {'kind': kind, 'name': name}
+    repeated = recorder.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD)
+
+    if duration * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+        slow_logger.warning(
+            "Slow %s %s: %.1f ms, %d queries, %.1f ms in DB",
+            kind, name, duration * 1000, recorder.count, recorder.duration * 1000,
+        )
+    for shape, count in repeated:
+        logger.warning("Possible N+1 in %s %s: %d x %s", kind, name, count, shape)
+
+    samples = {
+        _sample('jobtracker_runs_total', labels): 1,
+        _sample('jobtracker_run_duration_seconds_sum', labels): duration,
+        _sample('jobtracker_run_duration_seconds_count', labels): 1,
+        _sample('jobtracker_db_queries_total', labels): recorder.count,
+        _sample('jobtracker_db_duration_seconds_total', labels): recorder.duration,
+    }
+    for bound in DURATION_BUCKETS:
+        if duration <= bound:
+            samples[_sample('jobtracker_run_duration_seconds_bucket', {**labels, 'le': bound})] = 1
+    samples[_sample('jobtracker_run_duration_seconds_bucket', {**labels, 'le': '+Inf'})] = 1
+    if repeated:
+        samples[_sample('jobtracker_n_plus_one_total', labels)] = 1
+
+    global _unavailable_until
+    if time.monotonic() < _unavailable_until:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for field, amount in samples.items():
+            pipe.hincrbyfloat(METRICS_KEY, field, amount)
+        pipe.execute()
+    except redis.RedisError as exc:
+        _unavailable_until = time.monotonic() + settings.METRICS_RETRY_SECONDS
+        logger.warning("Metrics store unavailable, dropping samples for %ss: %s", settings.METRICS_RETRY_SECONDS, exc)
+
+
+def _family(sample: str) -> str:
+    name = sample.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in METRIC_FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def _sample_order(item: tuple[str, float]) -> tuple[str, float]:
+    # Buckets go in ascending numeric order of ``le``, with +Inf last.
+    sample = item[0]
+    match = _LE_RE.search(sample)
+    if match is None:
+        return sample, 0.0
+    return _LE_RE.sub('', sample, count=1), float(match.group(1))
+
+
+def render_metrics() -> str:
+    """Render the aggregated samples in the Prometheus text format"""
+    stored = get_redis().hgetall(METRICS_KEY)
+    by_family: dict[str, list[tuple[str, float]]] = {}
+    for field, value in stored.items():
+        sample = field.decode()
+        by_family.setdefault(_family(sample), []).append((sample, float(value)))
+
+    lines = []
+    for family, (metric_type, help_text) in METRIC_FAMILIES.items():
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {metric_type}')
+        for sample, value in sorted(by_family.get(family, []), key=_sample_order):
+            lines.append(f'{sample} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, DB time and N+1 patterns for every request.
+
+    The middleware is sync- and async-capable and follows the chain below
+    it. With sync-only middleware further down (WhiteNoise), Django adapts
+    that part of the chain under ASGI, and queries run in its
+    thread-sensitive thread; the recorder is installed and reported from
+    that thread so it sees their connections. Streaming responses are not
+    reported: their lifetime is the client's, not a latency.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        self._report(request, response, time.perf_counter() - start, recorder)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        stack = ExitStack()
+        recorder = await sync_to_async(stack.enter_context)(record_queries())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        await sync_to_async(self._report)(request, response, time.perf_counter() - start, recorder)
+        return response
+
+    def _report(self, request, response, duration: float, recorder: QueryRecorder) -> None:
+        if response.streaming:
+            return
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match and match.view_name else 'unresolved'
+        if name != 'metrics':
+            report('request', name, duration, recorder)
+
+
+_task_runs: dict[str, tuple[ExitStack, QueryRecorder, float]] = {}
+
+
+def _discard_task_run(task_id: str) -> None:
+    run = _task_runs.pop(task_id, None)
+    if run is not None:
+        run[0].close()
+
+
+def _task_prerun(task_id=None, task=None, **kwargs) -> None:
+    now = time.perf_counter()
+    for stale in [key for key, (_, _, start) in _task_runs.items() if now - start > TASK_RUN_TTL]:
+        _discard_task_run(stale)
+    stack = ExitStack()
+    recorder = stack.enter_context(record_queries())
+    _task_runs[task_id] = (stack, recorder, time.perf_counter())
+
+
+def _task_postrun(task_id=None, task=None, **kwargs) -> None:
+    run = _task_runs.pop(task_id, None)
+    if run is None:
+        return
+    stack, recorder, start = run
+    stack.close()
+    report('task', task.name, time.perf_counter() - start, recorder)
+
+
+def _task_revoked(request=None, **kwargs) -> None:
+    if request is not None:
+        _discard_task_run(request.id)
+
+
+def connect_task_signals() -> None:
+    """Hook query recording into Celery's task lifecycle signals"""
+    from celery.signals import task_postrun, task_prerun, task_revoked
+
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
+    # A revoked task may never reach task_postrun; stale runs are also
+    # dropped at the next prerun after TASK_RUN_TTL.
+    task_revoked.connect(_task_revoked, weak=False)
@@ -0,0 +1,41 @@
+"""
+Deferred imports for heavy optional SDKs.
+
+Web and worker processes import every view and task module at startup, so
+module-level imports of large SDKs (NumPy, pyarrow, OpenAI, Google API
+client, Selenium, lxml) are paid by every process, whether or not it ever
+calls them. ``lazy_import`` returns a stand-in that performs the import on
+first attribute access instead.
+"""
+import importlib
+from types import ModuleType
+from typing import Optional
+
+HEAVY_MODULES = [
+    'openai', 'langchain', 'googleapiclient', 'google.oauth2', 'selenium', 'lxml', 'bs4',
+    'numpy', 'pandas', 'pyarrow',
+]
+
+
+class LazyModule:
+    """Proxy that imports ``name`` the first time one of its attributes is used"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
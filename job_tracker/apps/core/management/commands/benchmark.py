@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import benchmarking
+
+
+class Command(BaseCommand):
+    help = "Run the local performance benchmarks and compare them with stored baselines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Benchmarks to run (default: all)")
+        parser.add_argument('--repeat', type=int, default=None)
+        parser.add_argument('--threshold', type=float, default=settings.BENCHMARK_REGRESSION_THRESHOLD,
+                            help="Allowed relative slowdown before failing, e.g. 0.2 for 20%%")
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Store this run's results as the new baselines")
+        parser.add_argument('--list', action='store_true', help="List registered benchmarks")
+
+    def handle(self, *args, **options):
+        available = benchmarking.registered()
+        if options['list']:
+            for name in available:
+                self.stdout.write(name)
+            return
+
+        unknown = set(options['names']) - set(available)
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+        selected = [available[name] for name in options['names'] or available]
+        baselines = benchmarking.load_baselines()
+        results, regressions, missing = [], [], []
+
+        for item in selected:
+            result = benchmarking.run(item, repeat=options['repeat'])
+            results.append(result)
+            line = f"{result.name:<32} {result.median_ms:>10.2f} ms"
+            if result.items_per_second:
+                line += f"  {result.items_per_second:>10.0f} items/s"
+            baseline = baselines.get(result.name)
+            if baseline:
+                line += f"  (baseline {baseline['median_ms']:.2f} ms)"
+            else:
+                missing.append(result.name)
+
+            slowdown = benchmarking.regression(result, baselines, options['threshold'])
+            if slowdown is not None:
+                regressions.append(result.name)
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSION +{slowdown:.0%}"))
+            else:
+                self.stdout.write(line)
+
+        if options['update_baseline']:
+            benchmarking.save_baselines(results)
+            self.stdout.write(self.style.SUCCESS(f"Updated baselines in {settings.BENCHMARK_BASELINE_PATH}"))
+            return
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"No baseline for {', '.join(missing)} in {settings.BENCHMARK_BASELINE_PATH}; "
+                f"record one with --update-baseline (see benchmarks/README.md)"
+            ))
+        if regressions:
+            raise CommandError(f"Performance regression in: {', '.join(regressions)}")
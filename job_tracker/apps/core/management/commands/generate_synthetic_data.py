@@ -0,0 +1,111 @@
+import random
+import time
+
+import factory
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.core.factories import PLATFORMS, JobPlatformFactory, reseed
+from apps.dashboard import funnel
+from apps.dashboard.factories import AnalyticsEventFactory
+from apps.dashboard.models import AnalyticsEvent
+from apps.documents.factories import DocumentVersionFactory, GeneratedDocumentFactory
+from apps.documents.models import DocumentVersion, GeneratedDocument
+from apps.integrations.factories import EmailFactory, EmailThreadFactory
+from apps.integrations.models import Email, EmailThread
+from apps.jobs import companies, history
+from apps.jobs.factories import ApplicationFactory, JobFactory
+from apps.jobs.models import Application, Job
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a realistic German/English synthetic dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=10000, help="Number of jobs to create")
+        parser.add_argument('--application-rate', type=float, default=0.1,
+                            help="Fraction of jobs that get an application")
+        parser.add_argument('--emails-per-thread', type=int, default=4,
+                            help="Upper bound of emails per application thread")
+        parser.add_argument('--events-per-job', type=int, default=3,
+                            help="Upper bound of analytics events per job")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['application_rate'] <= 1:
+            raise CommandError("--application-rate must be between 0 and 1")
+        if options['seed'] is not None:
+            reseed(options['seed'])
+
+        platforms = [JobPlatformFactory(name=name) for name in PLATFORMS]
+        remaining = options['jobs']
+        created = 0
+        start = time.perf_counter()
+
+        while remaining > 0:
+            size = min(options['batch_size'], remaining)
+            with transaction.atomic():
+                jobs = JobFactory.build_batch(size, platform=factory.Iterator(platforms))
+                profiles = companies.resolve(job.company for job in jobs)
+                for job in jobs:
+                    job.company_profile = profiles[job.company]
+                jobs = Job.objects.bulk_create(jobs)
+                self._create_related(jobs, options)
+            remaining -= size
+            created += size
+            rate = created / (time.perf_counter() - start)
+            self.stdout.write(f"{created}/{options['jobs']} jobs ({rate:.0f} jobs/s)")
+
+        funnel.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Created {created} jobs with related data"))
+
+    def _create_related(self, jobs: list[Job], options: dict) -> None:
+        sample = random.sample(jobs, int(len(jobs) * options['application_rate']))
+        built = [ApplicationFactory.build(job=job) for job in sample]
+        created_at = [application.created_at for application in built]
+        applications = Application.objects.bulk_create(built)
+        # bulk_create stamps auto_now_add fields with now; backdate them so
+        # cohorts spread over the months the jobs were posted in.
+        for application, value in zip(applications, created_at):
+            application.created_at = value
+        Application.objects.bulk_update(applications, ['created_at'], batch_size=options['batch_size'])
+        history.reconstruct(applications)
+        applied = [application for application in applications if application.status != 'not_applied']
+
+        threads = EmailThread.objects.bulk_create(
+            [EmailThreadFactory.build(application=application) for application in applied]
+        )
+        Email.objects.bulk_create(
+            [
+                EmailFactory.build(thread=thread)
+                for thread in threads
+                for _ in range(random.randint(1, options['emails_per_thread']))
+            ],
+            batch_size=options['batch_size'],
+        )
+
+        documents = GeneratedDocument.objects.bulk_create(
+            [
+                GeneratedDocumentFactory.build(application=application, document_type=document_type)
+                for application in applied
+                for document_type in ('cv', 'cover_letter')
+            ]
+        )
+        DocumentVersion.objects.bulk_create(
+            [
+                DocumentVersionFactory.build(document=document, version_number=number)
+                for document in documents
+                for number in range(1, random.randint(1, 3) + 1)
+            ],
+            batch_size=options['batch_size'],
+        )
+
+        AnalyticsEvent.objects.bulk_create(
+            [
+                AnalyticsEventFactory.build(data={'job_id': job.pk})
+                for job in jobs
+                for _ in range(random.randint(0, options['events_per_job']))
+            ],
+            batch_size=options['batch_size'],
+        )
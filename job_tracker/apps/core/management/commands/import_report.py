@@ -0,0 +1,96 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.lazy import HEAVY_MODULES
+
+# App submodules each kind of process imports at startup.
+PROFILES = {
+    'web': {'submodules': ['admin', 'urls', 'views'], 'extra': ['ROOT_URLCONF']},
+    'worker': {'submodules': ['tasks'], 'extra': ['job_tracker.celery']},
+}
+
+STARTUP_SCRIPT = """
+import importlib, importlib.util, json, sys
+import django
+django.setup()
+from django.apps import apps
+
+def load(module):
+    try:
+        found = importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        found = False
+    if found:
+        importlib.import_module(module)
+
+for config in apps.get_app_configs():
+    for submodule in {submodules!r}:
+        load(config.name + '.' + submodule)
+from django.conf import settings
+for module in {extra!r}:
+    load(getattr(settings, module, module))
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Sum ``-X importtime`` self times (microseconds) per top-level package"""
+    totals: dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us)
+    return totals
+
+
+class Command(BaseCommand):
+    help = "Measure startup import time and memory of a web or worker process against a budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='web')
+        parser.add_argument('--top', type=int, default=15, help="Packages to list")
+        parser.add_argument('--budget-ms', type=int, default=settings.STARTUP_IMPORT_BUDGET_MS)
+        parser.add_argument('--budget-mb', type=int, default=settings.STARTUP_RSS_BUDGET_MB)
+        parser.add_argument('--allow-heavy', action='store_true',
+                            help="Do not fail when heavy SDKs are imported at startup")
+
+    def handle(self, *args, **options):
+        script = STARTUP_SCRIPT.format(**PROFILES[options['profile']])
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'job_tracker.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        totals = parse_importtime(result.stderr)
+        total_ms = sum(totals.values()) / 1000
+        loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+        heavy = [name for name in HEAVY_MODULES if name in loaded]
+
+        self.stdout.write(f"{options['profile']} startup: {total_ms:.0f} ms importing, {rss_mb:.0f} MB max RSS")
+        for package, micros in sorted(totals.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {micros / 1000:>8.1f} ms  {package}")
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"Heavy SDKs imported at startup: {', '.join(heavy)}"))
+
+        failures = []
+        if total_ms > options['budget_ms']:
+            failures.append(f"import time {total_ms:.0f} ms > {options['budget_ms']} ms")
+        if rss_mb > options['budget_mb']:
+            failures.append(f"RSS {rss_mb:.0f} MB > {options['budget_mb']} MB")
+        if heavy and not options['allow_heavy']:
+            failures.append(f"eager imports of {', '.join(heavy)}")
+        if failures:
+            raise CommandError(f"Startup budget exceeded: {'; '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Within startup budget"))
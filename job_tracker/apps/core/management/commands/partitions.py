@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import partitioning
+
+
+class Command(BaseCommand):
+    help = "Convert, extend and archive the monthly partitions of append-only tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['convert', 'ensure', 'archive', 'status'])
+        parser.add_argument('--dry-run', action='store_true', help="Only list what would be archived")
+
+    def handle(self, *args, **options):
+        action = options['action']
+        for model in partitioning.partitioned_models():
+            table = model._meta.db_table
+            partitioned = partitioning.is_partitioned(table)
+
+            if action == 'convert':
+                if partitioned:
+                    self.stdout.write(f"{table}: already partitioned")
+                    continue
+                partitioning.convert_to_partitioned(model)
+                self.stdout.write(self.style.SUCCESS(f"{table}: converted"))
+            elif not partitioned:
+                raise CommandError(f"{table} is not partitioned yet, run 'partitions convert' first")
+            elif action == 'ensure':
+                created = partitioning.ensure_partitions(model)
+                self.stdout.write(f"{table}: {', '.join(created)}")
+            elif action == 'archive':
+                archived = partitioning.archive_expired_partitions(model, dry_run=options['dry_run'])
+                self.stdout.write(f"{table}: archived {len(archived)} partition(s) {', '.join(archived)}")
+            else:
+                partitions = partitioning.list_partitions(table)
+                months = [month.strftime('%Y-%m') for _, month in partitions]
+                self.stdout.write(f"{table}: {len(months)} partition(s) {', '.join(months)}")
+
+        if action == 'archive':
+            count = partitioning.archive_expired_jobs(dry_run=options['dry_run'])
+            self.stdout.write(f"jobs_job: archived {count} expired job(s)")
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from apps.core.querysets import TimeRangeQuerySet
+
 
 class JobPlatform(models.Model):
     """Job platform configuration for API integrations"""
@@ -9,6 +12,8 @@ class JobPlatform(models.Model):
     api_endpoint = models.URLField()
     api_key = models.CharField(max_length=255)
     rate_limit = models.IntegerField(default=100)
+    poll_interval = models.IntegerField(default=3600)  # Seconds, adapted to posting frequency
+    next_poll_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -93,7 +98,10 @@ class TranslationUsage(models.Model):
     service_name = models.CharField(max_length=50)
     character_count = models.IntegerField()
     cost = models.DecimalField(max_digits=10, decimal_places=4, default=0)
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=timezone.localdate)  # One row per service and day, see apps.core.usage
+
+    partition_field = 'date'
+    objects = TimeRangeQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Translation Usage")
@@ -105,8 +113,25 @@ class TranslationUsage(models.Model):
 
     @classmethod
     def log_usage(cls, service, text, cost=0):
-        return cls.objects.create(
-            service_name=service,
-            character_count=len(text),
-            cost=cost
-        )
+        """Count a translation towards today's row; rows are written by ``usage.flush``"""
+        from apps.core import usage
+
+        usage.record(service, len(text), cost, translation=True)
+
+
+class DailyUsage(models.Model):
+    """Per-service call count, units and cost for one day"""
+    service = models.CharField(max_length=50)  # openai, google, libretranslate, etc.
+    date = models.DateField()
+    calls = models.PositiveIntegerField(default=0)
+    units = models.BigIntegerField(default=0)  # Characters translated or tokens used
+    cost = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+
+    class Meta:
+        unique_together = ['service', 'date']
+        verbose_name = _("Daily Usage")
+        verbose_name_plural = _("Daily Usage")
+        ordering = ['-date', 'service']
+
+    def __str__(self):
+        return f"{self.service} - {self.calls} calls, {self.cost} ({self.date})"
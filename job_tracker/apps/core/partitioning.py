@@ -0,0 +1,388 @@
+"""
+Monthly range partitioning and Parquet archival for append-only tables.
+
+Tables listed in ``PARTITION_RETENTION_MONTHS`` are converted once into
+PostgreSQL declarative partitioned tables keyed on the model's
+``partition_field``. Partitions are named ``<table>_pYYYYMM``; expired ones
+are exported to zstd-compressed Parquet under ``ARCHIVE_ROOT`` and then
+detached and dropped instead of running a mass ``DELETE``. Rows outside
+every monthly partition land in ``<table>_default``; they move into their
+month's partition when it is created, and expired ones are archived and
+deleted from the default partition. Recent-data queries go through
+``TimeRangeQuerySet`` so the planner prunes old partitions, and
+``read_archive`` queries what has been archived.
+
+PostgreSQL only enforces unique indexes that include the partition column,
+so a unique key without it (``Email.message_id``) is kept in a plain
+``<table>_<columns>_guard`` table filled by an insert/update trigger. Keys
+stay reserved after their row is archived, so archived rows are not
+imported again. ``ON CONFLICT DO NOTHING`` does not cover these keys, so
+bulk inserts must leave out existing keys themselves.
+
+``Job`` is the target of ``Application.job`` and PostgreSQL cannot reference
+a partitioned table whose primary key includes the partition column from an
+ordinary ``bigint`` foreign key, so expired jobs without applications are
+archived and deleted in primary-key batches instead.
+"""
+import datetime
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from apps.core.lazy import lazy_import
+
+pa = lazy_import('pyarrow')
+ds = lazy_import('pyarrow.dataset')
+pq = lazy_import('pyarrow.parquet')
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_NAME_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def month_start(value: datetime.date) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(value: datetime.date, months: int) -> datetime.date:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime.date) -> str:
+    return f'{table}_p{month.year}{month.month:02d}'
+
+
+def default_partition_name(table: str) -> str:
+    return f'{table}_default'
+
+
+def retention_cutoff(months: int, today: Optional[datetime.date] = None) -> datetime.date:
+    """First day of the oldest month kept by a ``months``-month retention window"""
+    return add_months(month_start(today or timezone.localdate()), -months)
+
+
+def partitioned_models() -> list[type[models.Model]]:
+    """Models configured for monthly partitioning, in settings order"""
+    return [apps.get_model(label) for label in settings.PARTITION_RETENTION_MONTHS]
+
+
+def list_partitions(table: str) -> list[tuple[str, datetime.date]]:
+    """Return ``(name, month)`` for every monthly partition of ``table``"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME_RE.search(name)
+        if match:
+            partitions.append((name, datetime.date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def is_partitioned(table: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid "
+            "WHERE relname = %s",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def create_partition(model: type[models.Model], month: datetime.date) -> str:
+    """Create ``month``'s partition, moving its rows out of the default partition"""
+    table = model._meta.db_table
+    column = model._meta.get_field(model.partition_field).column
+    name = partition_name(table, month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0] is not None:
+            return name
+        # A partition cannot be created while the default partition holds rows
+        # in its range, so build it detached, move those rows and attach it.
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{default_partition_name(table)}" '
+            f'WHERE "{column}" >= %s AND "{column}" < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(f"ALTER TABLE \"{table}\" ATTACH PARTITION \"{name}\" FOR VALUES FROM ('{start}') TO ('{end}')")
+    return name
+
+
+def ensure_partitions(model: type[models.Model], months_ahead: Optional[int] = None) -> list[str]:
+    """Create the current month's partition and ``months_ahead`` future ones"""
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    current = month_start(timezone.now().date())
+    return [create_partition(model, add_months(current, offset)) for offset in range(months_ahead + 1)]
+
+
+def _unique_keys(cursor, table: str, column: str) -> list[list[str]]:
+    """Columns of the unique indexes of ``table`` that do not include ``column``"""
+    cursor.execute(
+        """
+        SELECT array_agg(attribute.attname ORDER BY key.position) FROM pg_index
+        CROSS JOIN unnest(pg_index.indkey) WITH ORDINALITY AS key(attnum, position)
+        JOIN pg_attribute attribute ON attribute.attrelid = pg_index.indrelid AND attribute.attnum = key.attnum
+        WHERE pg_index.indrelid = %s::regclass AND pg_index.indisunique AND NOT pg_index.indisprimary
+        GROUP BY pg_index.indexrelid
+        """,
+        [table],
+    )
+    return [columns for (columns,) in cursor.fetchall() if column not in columns]
+
+
+def _guard_unique(cursor, table: str, source: str, columns: list[str]) -> str:
+    """Enforce uniqueness of ``columns`` across all partitions through a key table"""
+    # Not ``_key``: PostgreSQL already gives that name to the unique index.
+    guard = f'{table}_{"_".join(columns)}_guard'[:63]
+    quoted = ', '.join(f'"{name}"' for name in columns)
+    new = ', '.join(f'NEW."{name}"' for name in columns)
+    changed = ' OR '.join(f'OLD."{name}" IS DISTINCT FROM NEW."{name}"' for name in columns)
+    cursor.execute(f'CREATE TABLE "{guard}" AS SELECT {quoted} FROM "{source}"')
+    cursor.execute(f'ALTER TABLE "{guard}" ADD PRIMARY KEY ({quoted})')
+    cursor.execute(
+        f'CREATE FUNCTION "{guard}_reserve"() RETURNS trigger LANGUAGE plpgsql AS $$ '
+        f'BEGIN INSERT INTO "{guard}" ({quoted}) VALUES ({new}); RETURN NEW; END $$'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER "{guard}_insert" BEFORE INSERT ON "{table}" '
+        f'FOR EACH ROW EXECUTE FUNCTION "{guard}_reserve"()'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER "{guard}_update" BEFORE UPDATE ON "{table}" '
+        f'FOR EACH ROW WHEN ({changed}) EXECUTE FUNCTION "{guard}_reserve"()'
+    )
+    return guard
+
+
+def convert_to_partitioned(model: type[models.Model]) -> None:
+    """
+    Rebuild ``model``'s table as a range-partitioned table.
+
+    The primary key and unique indexes are widened with the partition column,
+    as PostgreSQL requires, unique keys without it are guarded by a key
+    table, and existing rows are copied into monthly partitions. Intended to
+    run once, during a maintenance window.
+    """
+    table = model._meta.db_table
+    column = model._meta.get_field(model.partition_field).column
+    legacy = f'{table}_legacy'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE contype = 'p')",
+            [table],
+        )
+        index_defs = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        unique_keys = _unique_keys(cursor, table, column)
+        cursor.execute(f'SELECT min("{column}"), max("{column}") FROM "{table}"')
+        oldest, newest = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE ("{column}")'
+        )
+        cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY ("id", "{column}")')
+        cursor.execute(f'CREATE TABLE "{default_partition_name(table)}" PARTITION OF "{table}" DEFAULT')
+
+        today = month_start(timezone.now().date())
+        month = month_start(oldest) if oldest else today
+        last = add_months(today, settings.PARTITION_MONTHS_AHEAD)
+        if newest and month_start(newest) > last:
+            last = month_start(newest)
+        while month <= last:
+            create_partition(model, month)
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+        guards = [_guard_unique(cursor, table, legacy, columns) for columns in unique_keys]
+        cursor.execute(f'DROP TABLE "{legacy}"')
+
+        for name, definition in index_defs:
+            if definition.startswith('CREATE UNIQUE INDEX'):
+                definition = re.sub(r'\)$', f', "{column}")', definition)
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'COALESCE((SELECT max("id") FROM "{table}"), 0) + 1, false)'
+        )
+    logger.info("Converted %s to monthly partitions on %s", table, column)
+    for guard in guards:
+        logger.info("Unique key of %s enforced through %s", table, guard)
+
+
+def _arrow_type(field: models.Field):
+    internal = field.get_internal_type()
+    if internal in ('AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField',
+                    'PositiveIntegerField', 'SmallIntegerField', 'ForeignKey'):
+        return pa.int64()
+    if internal == 'DateTimeField':
+        return pa.timestamp('us', tz='UTC')
+    if internal == 'DateField':
+        return pa.date32()
+    if internal == 'DecimalField':
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if internal == 'FloatField':
+        return pa.float64()
+    if internal == 'BooleanField':
+        return pa.bool_()
+    return pa.string()
+
+
+def _arrow_schema(model: type[models.Model]):
+    return pa.schema([(field.column, _arrow_type(field)) for field in model._meta.concrete_fields])
+
+
+def _rows_to_batch(model: type[models.Model], schema, rows: list[tuple]):
+    json_columns = {
+        index for index, field in enumerate(model._meta.concrete_fields)
+        if field.get_internal_type() == 'JSONField'
+    }
+    columns = list(zip(*rows))
+    arrays = []
+    for index, values in enumerate(columns):
+        if index in json_columns:
+            values = [json.dumps(value) if value is not None else None for value in values]
+        arrays.append(pa.array(values, type=schema.field(index).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_to_parquet(model: type[models.Model], source_sql: str, params: Iterable, path: Path) -> int:
+    """Stream the rows selected by ``source_sql`` into a Parquet file"""
+    schema = _arrow_schema(model)
+    columns = ', '.join(f'"{field.column}"' for field in model._meta.concrete_fields)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    exported = 0
+
+    with transaction.atomic(), connection.chunked_cursor() as cursor:
+        cursor.execute(f'SELECT {columns} FROM ({source_sql}) AS source', params)
+        with pq.ParquetWriter(tmp_path, schema, compression='zstd') as writer:
+            while rows := cursor.fetchmany(settings.ARCHIVE_BATCH_SIZE):
+                writer.write_batch(_rows_to_batch(model, schema, rows))
+                exported += len(rows)
+    os.replace(tmp_path, path)
+    return exported
+
+
+def archive_path(model: type[models.Model], label: str) -> Path:
+    return Path(settings.ARCHIVE_ROOT) / model._meta.db_table / f'{label}.parquet'
+
+
+def archive_expired_partitions(model: type[models.Model], dry_run: bool = False) -> list[str]:
+    """Export partitions older than the retention window, then drop them"""
+    table = model._meta.db_table
+    cutoff = retention_cutoff(settings.PARTITION_RETENTION_MONTHS[model._meta.label])
+    archived = []
+
+    for name, month in list_partitions(table):
+        if month >= cutoff:
+            continue
+        archived.append(name)
+        if dry_run:
+            continue
+        count = export_to_parquet(
+            model, f'SELECT * FROM "{name}"', [], archive_path(model, month.strftime('%Y-%m')),
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+        logger.info("Archived partition %s (%d rows)", name, count)
+
+    if archive_default_partition(model, cutoff, dry_run=dry_run):
+        archived.append(default_partition_name(table))
+    return archived
+
+
+def archive_default_partition(model: type[models.Model], cutoff: datetime.date, dry_run: bool = False) -> int:
+    """Export and delete default-partition rows older than ``cutoff``"""
+    default = default_partition_name(model._meta.db_table)
+    column = model._meta.get_field(model.partition_field).column
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM "{default}" WHERE "{column}" < %s', [cutoff])
+        expired = cursor.fetchone()[0]
+    if not expired or dry_run:
+        return expired
+
+    source = f'SELECT * FROM "{default}" WHERE "{column}" < %s'
+    with transaction.atomic():
+        count = export_to_parquet(model, source, [cutoff], archive_path(model, f'default-{timezone.now():%Y%m%d%H%M%S}'))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{default}" WHERE "{column}" < %s', [cutoff])
+    logger.info("Archived %d rows from %s", count, default)
+    return count
+
+
+def archive_expired_jobs(dry_run: bool = False) -> int:
+    """Archive and delete jobs past retention that never got an application"""
+    from apps.jobs.models import Job
+
+    cutoff = timezone.make_aware(datetime.datetime.combine(
+        retention_cutoff(settings.JOB_RETENTION_MONTHS), datetime.time.min,
+    ))
+    expired = Job.objects.filter(scraped_date__lt=cutoff, applications__isnull=True).order_by('pk')
+    if dry_run:
+        return expired.count()
+
+    archived = 0
+    while ids := list(expired.values_list('pk', flat=True)[:settings.ARCHIVE_BATCH_SIZE]):
+        label = f'{cutoff:%Y-%m-%d}-{ids[0]}'
+        placeholders = ', '.join(['%s'] * len(ids))
+        export_to_parquet(
+            Job, f'SELECT * FROM "{Job._meta.db_table}" WHERE "id" IN ({placeholders})',
+            ids, archive_path(Job, label),
+        )
+        Job.objects.filter(pk__in=ids).delete()
+        archived += len(ids)
+    logger.info("Archived %d expired jobs", archived)
+    return archived
+
+
+def read_archive(model: type[models.Model], start: Optional[datetime.datetime] = None,
+                 end: Optional[datetime.datetime] = None, columns: Optional[list[str]] = None):
+    """Query archived rows of ``model`` as a pandas DataFrame"""
+    root = Path(settings.ARCHIVE_ROOT) / model._meta.db_table
+    if not root.exists():
+        return _arrow_schema(model).empty_table().to_pandas()
+
+    dataset = ds.dataset(root, format='parquet', schema=_arrow_schema(model))
+    column = model._meta.get_field(model.partition_field).column
+    expression = None
+    if start is not None:
+        expression = ds.field(column) >= pa.scalar(start, type=dataset.schema.field(column).type)
+    if end is not None:
+        upper = ds.field(column) < pa.scalar(end, type=dataset.schema.field(column).type)
+        expression = upper if expression is None else expression & upper
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
@@ -0,0 +1,18 @@
+import datetime
+
+from django.db import models
+from django.utils import timezone
+
+
+class TimeRangeQuerySet(models.QuerySet):
+    """QuerySet whose time filters let PostgreSQL prune old partitions"""
+
+    def recent(self, days: int = 30) -> 'TimeRangeQuerySet':
+        return self.since(timezone.now() - datetime.timedelta(days=days))
+
+    def since(self, start: datetime.datetime) -> 'TimeRangeQuerySet':
+        return self.filter(**{f'{self.model.partition_field}__gte': start})
+
+    def between(self, start: datetime.datetime, end: datetime.datetime) -> 'TimeRangeQuerySet':
+        field = self.model.partition_field
+        return self.filter(**{f'{field}__gte': start, f'{field}__lt': end})
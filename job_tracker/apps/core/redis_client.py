@@ -0,0 +1,17 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Return a process-wide Redis client for REDIS_URL"""
+    global _client
+    if _client is None:
+        # Short timeouts: callers treat Redis as best-effort and must not hang a request on it.
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        )
+    return _client
@@ -0,0 +1,210 @@
+"""
+Read-replica routing for analytics, export and API list traffic.
+
+Reads go to a replica only inside ``use_replica`` blocks, which
+``ReplicaRoutingMiddleware`` opens for safe requests to
+``REPLICA_READ_PATHS``; everything else, and every write, uses the primary.
+A block sticks to one replica so its queries see a single snapshot. After
+a non-safe request the client gets the ``REPLICA_STICKY_COOKIE`` cookie and
+reads from the primary for ``REPLICA_STICKY_SECONDS``, so users see their
+own writes. Replicas are probed at most every ``REPLICA_HEALTH_INTERVAL``
+seconds; unreachable ones, or ones lagging more than ``REPLICA_MAX_LAG``
+seconds, are skipped until the next probe and their reads fall back to the
+primary. A request whose replica fails mid-way is re-run once on the primary.
+"""
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds since the last replayed transaction, or 0 when the replica has
+# replayed everything it received (or is not a streaming replica at all).
+LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class _Route:
+    replica: bool = False
+    pinned: bool = False
+    alias: Optional[str] = None  # Replica chosen at the block's first read
+
+
+_route: ContextVar[Optional[_Route]] = ContextVar('db_route', default=None)
+_health: dict[str, tuple[float, bool]] = {}  # alias -> (checked at, healthy)
+
+
+@contextmanager
+def use_replica() -> Iterator[None]:
+    """Serve reads in the enclosed block from a replica, unless pinned to the primary"""
+    current = _route.get()
+    if current is not None and current.pinned:
+        yield
+        return
+    token = _route.set(_Route(replica=True))
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Serve every read in the enclosed block, including nested ``use_replica`` blocks, from the primary"""
+    token = _route.set(_Route(pinned=True))
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def _probe(alias: str) -> bool:
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor != 'postgresql':
+                cursor.execute('SELECT 1')
+                return True
+            cursor.execute(LAG_SQL)
+            lag = float(cursor.fetchone()[0] or 0)
+    except DatabaseError as exc:
+        logger.warning("Replica %s unavailable: %s", alias, exc)
+        connection.close()
+        return False
+    if lag > settings.REPLICA_MAX_LAG:
+        logger.warning("Replica %s is %.1f s behind, reading from the primary", alias, lag)
+        return False
+    return True
+
+
+def is_healthy(alias: str) -> bool:
+    checked_at, healthy = _health.get(alias, (0.0, True))
+    if time.monotonic() - checked_at >= settings.REPLICA_HEALTH_INTERVAL:
+        healthy = _probe(alias)
+        _health[alias] = (time.monotonic(), healthy)
+    return healthy
+
+
+def mark_unhealthy(alias: str) -> None:
+    _health[alias] = (time.monotonic(), False)
+
+
+def healthy_replicas() -> list[str]:
+    return [alias for alias in settings.DATABASE_REPLICAS if is_healthy(alias)]
+
+
+class ReplicaRouter:
+    """Send reads inside ``use_replica`` blocks to a healthy replica, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        if route is None or not route.replica:
+            return DEFAULT_DB_ALIAS
+        if route.alias is None or not is_healthy(route.alias):
+            replicas = healthy_replicas()
+            route.alias = random.choice(replicas) if replicas else None
+        return route.alias or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route safe requests to replica-friendly paths to a replica, with read-your-writes stickiness.
+
+    A replica request that ends in a server error after its replica
+    connection raised is run once more on the primary. The first attempt has
+    already passed through the middleware below this one; its response is
+    discarded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.read_paths = re.compile('|'.join(settings.REPLICA_READ_PATHS)) if settings.REPLICA_READ_PATHS else None
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _target(self, request) -> Optional[str]:
+        if request.method not in SAFE_METHODS or settings.REPLICA_STICKY_COOKIE in request.COOKIES:
+            return 'primary'
+        if settings.DATABASE_REPLICAS and self.read_paths and self.read_paths.search(request.path_info):
+            return 'replica'
+        return None
+
+    def _replica_failed(self, request, response) -> bool:
+        """Whether ``response`` is an error caused by the current block's replica, which is then taken out"""
+        route = _route.get()
+        # The error wrapper flags a connection whose query raised, so
+        # failures of the primary are not retried.
+        if (response.status_code < 500 or route is None or not route.alias
+                or not connections[route.alias].errors_occurred):
+            return False
+        logger.warning("Replica %s failed during %s, retrying on the primary", route.alias, request.path)
+        mark_unhealthy(route.alias)
+        connections[route.alias].close()
+        return True
+
+    def _stick(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        target = self._target(request)
+        if target == 'replica':
+            with use_replica():
+                response = self.get_response(request)
+                if not self._replica_failed(request, response):
+                    return self._stick(request, response)
+            target = 'primary'
+        if target == 'primary':
+            with use_primary():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        return self._stick(request, response)
+
+    async def __acall__(self, request):
+        target = self._target(request)
+        if target == 'replica':
+            with use_replica():
+                response = await self.get_response(request)
+                # Sync views ran in the thread-sensitive thread, which owns their connections.
+                if not await sync_to_async(self._replica_failed)(request, response):
+                    return self._stick(request, response)
+            target = 'primary'
+        if target == 'primary':
+            with use_primary():
+                response = await self.get_response(request)
+        else:
+            response = await self.get_response(request)
+        return self._stick(request, response)
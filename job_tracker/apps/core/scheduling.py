@@ -0,0 +1,45 @@
+"""
+Scheduling primitives shared by the periodic Celery tasks.
+
+``singleton`` guards in-flight work with a Redis lock so overlapping beat
+runs never process the same unit twice. ``next_poll_interval`` implements the
+multiplicative back-off/speed-up used to adapt platform polling to how often
+new postings actually appear.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+
+from redis.exceptions import LockError
+
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def singleton(name: str, timeout: int, wait: float = 0) -> Iterator[bool]:
+    """
+    Hold the cluster-wide lock ``name`` for the enclosed block.
+
+    Yields ``False`` when another worker still holds it after ``wait``
+    seconds (by default without waiting at all). ``timeout`` bounds how long
+    a crashed worker can keep the lock.
+    """
+    lock = get_redis().lock(f'lock:{name}', timeout=timeout, blocking=wait > 0, blocking_timeout=wait or None)
+    acquired = lock.acquire()
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except LockError:
+                logger.warning("Lock %s expired before the work finished", name)
+
+
+def next_poll_interval(current: int, new_items: int, minimum: int, maximum: int) -> int:
+    """Halve the interval after a productive poll, grow it by half after an empty one"""
+    if new_items > 0:
+        return max(minimum, current // 2)
+    return min(maximum, current * 3 // 2)
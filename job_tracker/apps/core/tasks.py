@@ -0,0 +1,28 @@
+import logging
+
+from celery import shared_task
+
+from apps.core import partitioning, usage
+from apps.core.scheduling import singleton
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def maintain_partitions_task():
+    """Create upcoming monthly partitions and archive expired ones"""
+    for model in partitioning.partitioned_models():
+        if not partitioning.is_partitioned(model._meta.db_table):
+            logger.warning("%s is not partitioned, skipping maintenance", model._meta.db_table)
+            continue
+        partitioning.ensure_partitions(model)
+        partitioning.archive_expired_partitions(model)
+    partitioning.archive_expired_jobs()
+
+
+@shared_task
+def flush_usage_task():
+    """Upsert buffered usage counters into the daily totals"""
+    with singleton('flush-usage', timeout=300) as acquired:
+        if acquired:
+            usage.flush()
@@ -1,3 +1,344 @@
-from django.test import TestCase
+import datetime
+import io
+import time
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import fakeredis
+import redis
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.management import call_command
+from django.db import (
+    DEFAULT_DB_ALIAS, DatabaseError, IntegrityError, OperationalError, connection, connections, transaction,
+)
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.core import instrumentation, partitioning, redis_client, routers, usage
+from apps.core.benchmarking import BenchmarkResult, regression
+from apps.core.factories import JobPlatformFactory
+from apps.core.instrumentation import QueryInstrumentationMiddleware, QueryRecorder, normalize_sql, report
+from apps.core.models import DailyUsage, JobPlatform, TranslationUsage
+from apps.core.partitioning import _PARTITION_NAME_RE, add_months, month_start, partition_name, retention_cutoff
+from apps.integrations.factories import EmailFactory
+from apps.integrations.models import Email
+
+
+class NormalizeSqlTests(SimpleTestCase):
+    def test_collapses_in_lists_and_whitespace(self):
+        self.assertEqual(
+            normalize_sql('SELECT *\n  FROM "jobs_job" WHERE "id" IN (%s, %s, %s)'),
+            'SELECT * FROM "jobs_job" WHERE "id" IN (...)',
+        )
+
+
+@override_settings(REDIS_URL='redis://127.0.0.1:1/0', REDIS_CONNECT_TIMEOUT=0.5, METRICS_RETRY_SECONDS=30)
+class ReportTests(SimpleTestCase):
+    def setUp(self):
+        redis_client._client = None
+        instrumentation._unavailable_until = 0.0
+        self.addCleanup(setattr, redis_client, '_client', None)
+        self.addCleanup(setattr, instrumentation, '_unavailable_until', 0.0)
+
+    def test_unreachable_redis_does_not_raise(self):
+        start = time.monotonic()
+        with self.assertLogs('apps.core.instrumentation', 'WARNING'):
+            report('request', 'job_list', 0.01, QueryRecorder())
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_backs_off_after_failure(self):
+        with self.assertLogs('apps.core.instrumentation', 'WARNING'):
+            report('request', 'job_list', 0.01, QueryRecorder())
+        with mock.patch.object(instrumentation, 'get_redis') as get_redis:
+            report('request', 'job_list', 0.01, QueryRecorder())
+        get_redis.assert_not_called()
+
+    def test_client_has_short_timeouts(self):
+        kwargs = redis_client.get_redis().connection_pool.connection_kwargs
+        self.assertEqual(kwargs['socket_connect_timeout'], 0.5)
+        self.assertIsNotNone(kwargs['socket_timeout'])
+
+
+@override_settings(SLOW_REQUEST_THRESHOLD_MS=10_000, N_PLUS_ONE_THRESHOLD=5)
+class RenderMetricsTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(instrumentation, 'get_redis', return_value=fakeredis.FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        instrumentation._unavailable_until = 0.0
+
+    def test_buckets_are_in_numeric_order(self):
+        report('task', 'sync', 3.0, QueryRecorder())
+        buckets = [
+            line.split('le="')[1].split('"')[0]
+            for line in instrumentation.render_metrics().splitlines() if '_bucket{' in line
+        ]
+        self.assertEqual(buckets, ['5.0', '10.0', '30.0', '60.0', '+Inf'])
+
+    def test_stale_task_runs_are_dropped(self):
+        instrumentation._task_prerun(task_id='lost')
+        self.addCleanup(instrumentation._task_runs.clear)
+        instrumentation._task_revoked(request=mock.Mock(id='lost'))
+        self.assertNotIn('lost', instrumentation._task_runs)
+
+        instrumentation._task_prerun(task_id='stuck')
+        with mock.patch.object(instrumentation.time, 'perf_counter',
+                               return_value=time.perf_counter() + instrumentation.TASK_RUN_TTL + 1):
+            instrumentation._task_prerun(task_id='next')
+        self.assertEqual(list(instrumentation._task_runs), ['next'])
+
+
+def _query_view(request):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return HttpResponse('ok')
+
+
+@mock.patch('apps.core.instrumentation.report')
+class QueryInstrumentationMiddlewareTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/jobs/')
+
+    def test_sync_request_is_recorded(self, report):
+        QueryInstrumentationMiddleware(_query_view)(self.request)
+        self.assertEqual(report.call_args.args[3].count, 1)
+
+    def test_async_chain_records_queries_of_sync_code(self, report):
+        async def view(request):
+            return await sync_to_async(_query_view)(request)
+
+        middleware = QueryInstrumentationMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(self.request)
+        self.assertEqual(report.call_args.args[3].count, 1)
+
+    def test_streaming_responses_are_not_reported(self, report):
+        async def view(request):
+            return StreamingHttpResponse(iter([b'data']))
+
+        async_to_sync(QueryInstrumentationMiddleware(view))(self.request)
+        QueryInstrumentationMiddleware(lambda request: StreamingHttpResponse(iter([b'data'])))(self.request)
+        report.assert_not_called()
+
+
+class PartitionHelperTests(SimpleTestCase):
+    def test_month_arithmetic_crosses_years(self):
+        self.assertEqual(month_start(datetime.date(2024, 2, 29)), datetime.date(2024, 2, 1))
+        self.assertEqual(add_months(datetime.date(2024, 11, 15), 3), datetime.date(2025, 2, 1))
+        self.assertEqual(add_months(datetime.date(2024, 1, 31), -1), datetime.date(2023, 12, 1))
+
+    def test_partition_names_round_trip(self):
+        name = partition_name('integrations_email', datetime.date(2024, 3, 1))
+        self.assertEqual(name, 'integrations_email_p202403')
+        match = _PARTITION_NAME_RE.search(name)
+        self.assertEqual((match[1], match[2]), ('2024', '03'))
+        self.assertIsNone(_PARTITION_NAME_RE.search('integrations_email_default'))
+
+    def test_retention_cutoff_uses_calendar_months(self):
+        self.assertEqual(retention_cutoff(12, today=datetime.date(2024, 3, 31)), datetime.date(2023, 3, 1))
+        self.assertEqual(retention_cutoff(1, today=datetime.date(2024, 3, 1)), datetime.date(2024, 2, 1))
+
+
+@skipUnless(connection.vendor == 'postgresql', "Declarative partitioning needs PostgreSQL")
+@override_settings(PARTITION_RETENTION_MONTHS={'integrations.Email': 24}, PARTITION_MONTHS_AHEAD=1)
+class ConvertToPartitionedTests(TestCase):
+    def test_convert_email_keeps_rows_and_message_id_unique(self):
+        emails = EmailFactory.create_batch(3)
+        call_command('partitions', 'convert', stdout=io.StringIO())
+
+        self.assertTrue(partitioning.is_partitioned('integrations_email'))
+        self.assertEqual(Email.objects.count(), 3)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM "integrations_email_message_id_guard"')
+            self.assertEqual(cursor.fetchone()[0], 3)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EmailFactory(thread=emails[0].thread, message_id=emails[0].message_id)
+
+
+class RegressionTests(SimpleTestCase):
+    baselines = {'job_search': {'median_ms': 10.0}}
+
+    def test_flags_slowdown_above_threshold(self):
+        result = BenchmarkResult(name='job_search', median_ms=13.0, min_ms=12.0, max_ms=14.0)
+        self.assertAlmostEqual(regression(result, self.baselines, 0.2), 0.3)
+
+    def test_ignores_small_slowdown_and_missing_baseline(self):
+        result = BenchmarkResult(name='job_search', median_ms=11.0, min_ms=10.0, max_ms=12.0)
+        self.assertIsNone(regression(result, self.baselines, 0.2))
+        self.assertIsNone(regression(BenchmarkResult('job_ranking', 5.0, 4.0, 6.0), self.baselines, 0.2))
+
+
+@override_settings(
+    USAGE_PUSH_INTERVAL=60, USAGE_BUDGET_REFRESH=0,
+    USAGE_BUDGETS={'openai': {'daily': 1.0, 'monthly': 10.0}},
+)
+class UsageTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(usage, 'get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(usage.push)
+        usage._spend_cache.clear()
+
+    def test_record_schedules_a_push(self):
+        usage.record('openai', 100, 0.25)
+        self.assertIsNotNone(usage._timer)
+        self.assertFalse(self.redis.exists(usage.PENDING_KEY))
+        usage._timer.function()
+        self.assertIsNone(usage._timer)
+        self.assertEqual(float(self.redis.hget(usage.PENDING_KEY, f'{timezone.localdate()}|openai|cost')), 0.25)
+
+    def test_failed_push_keeps_counters(self):
+        usage.record('openai', 100, 0.25)
+        with mock.patch.object(self.redis, 'pipeline') as pipeline:
+            pipeline.return_value.execute.side_effect = redis.ConnectionError
+            with self.assertLogs('apps.core.usage', 'WARNING'):
+                usage.push()
+        self.assertEqual(usage._pending[(timezone.localdate().isoformat(), 'openai')], [1, 100, 0.25])
+        self.assertIsNotNone(usage._timer)
+
+    def test_flush_moves_counters_into_daily_totals(self):
+        usage.record('openai', 100, 0.25)
+        usage.record('openai', 50, 0.5)
+        self.assertEqual(usage.flush(), 1)
+        self.assertEqual(usage.flush(), 0)
+        row = DailyUsage.objects.get(service='openai', date=timezone.localdate())
+        self.assertEqual((row.calls, row.units, row.cost), (2, 150, Decimal('0.75')))
+        self.assertEqual(list(self.redis.scan_iter('usage:flushing:*')), [])
+
+    def test_translations_get_a_daily_row(self):
+        usage.record('openai', 100, 0.25)
+        TranslationUsage.log_usage('libretranslate', 'Hallo Welt', 0.01)
+        TranslationUsage.log_usage('libretranslate', 'Danke', 0.01)
+        usage.flush()
+        row = TranslationUsage.objects.get()
+        self.assertEqual((row.service_name, row.date), ('libretranslate', timezone.localdate()))
+        self.assertEqual((row.character_count, row.cost), (15, Decimal('0.02')))
+
+    def test_failed_flush_requeues_the_batch(self):
+        usage.record('openai', 100, 0.25)
+        with mock.patch.object(DailyUsage.objects, 'get_or_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                usage.flush()
+        self.assertFalse(DailyUsage.objects.exists())
+        usage.flush()
+        self.assertEqual(DailyUsage.objects.get(service='openai').calls, 1)
+
+    def test_budget_counts_unpushed_spend(self):
+        usage.check_budget('openai')
+        usage.record('openai', 1000, 1.5)
+        with self.assertRaises(usage.BudgetExceeded) as raised:
+            usage.check_budget('openai')
+        self.assertEqual(raised.exception.period, 'daily')
+        usage.check_budget('unbudgeted')
+
+    def test_summary_falls_back_to_flushed_totals(self):
+        DailyUsage.objects.create(service='openai', date=timezone.localdate(), calls=1, units=10, cost=Decimal('0.5'))
+        with mock.patch.object(self.redis, 'pipeline', side_effect=redis.ConnectionError):
+            with self.assertLogs('apps.core.usage', 'WARNING'):
+                summary = usage.spend_summary()
+        self.assertFalse(summary['live'])
+        self.assertEqual(summary['today'], {'openai': 0.5})
+        self.assertEqual(summary['month'], {'openai': 0.5})
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "Needs a replica alias, e.g. DB_REPLICA_HOSTS=localhost")
+@override_settings(
+    REPLICA_READ_PATHS=[r'^/funnel/'], REPLICA_STICKY_COOKIE='db_primary', REPLICA_STICKY_SECONDS=10,
+    REPLICA_HEALTH_INTERVAL=60, REPLICA_MAX_LAG=5,
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Runs against replicas configured with ``TEST: {'MIRROR': 'default'}``"""
+    databases = '__all__'
+
+    def setUp(self):
+        self.replica = settings.DATABASE_REPLICAS[0]
+        self.factory = RequestFactory()
+        routers._health.clear()
+        self.addCleanup(routers._health.clear)
+        self.addCleanup(connections[self.replica].close)
+        for alias in settings.DATABASE_REPLICAS[1:]:
+            routers.mark_unhealthy(alias)
+
+    def _middleware(self, view):
+        # The handler turns view exceptions into 500 responses below the middleware.
+        def get_response(request):
+            try:
+                return view(request)
+            except DatabaseError:
+                return HttpResponse(status=500)
+        return routers.ReplicaRoutingMiddleware(get_response)
+
+    def _read_alias(self, request) -> str:
+        aliases = []
+
+        def view(request):
+            aliases.append(JobPlatform.objects.all().db)
+            return HttpResponse()
+        self._middleware(view)(request)
+        return aliases[0]
+
+    def test_safe_reads_on_read_paths_use_the_replica(self):
+        self.assertEqual(self._read_alias(self.factory.get('/funnel/')), self.replica)
+        self.assertEqual(self._read_alias(self.factory.get('/jobs/')), DEFAULT_DB_ALIAS)
+
+    def test_writes_make_later_reads_sticky(self):
+        response = self._middleware(lambda request: HttpResponse())(self.factory.post('/funnel/'))
+        self.assertEqual(response.cookies['db_primary']['max-age'], 10)
+        request = self.factory.get('/funnel/')
+        request.COOKIES['db_primary'] = '1'
+        self.assertEqual(self._read_alias(request), DEFAULT_DB_ALIAS)
+        with routers.use_primary(), routers.use_replica():
+            self.assertEqual(JobPlatform.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        connection = connections[self.replica]
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchone.return_value = (12.0,)
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(connection, 'cursor', return_value=cursor):
+            with self.assertLogs('apps.core.routers', 'WARNING'):
+                self.assertEqual(self._read_alias(self.factory.get('/funnel/')), DEFAULT_DB_ALIAS)
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        connection = connections[self.replica]
+        with mock.patch.object(connection, 'cursor', side_effect=OperationalError('connection refused')):
+            with self.assertLogs('apps.core.routers', 'WARNING'):
+                self.assertEqual(self._read_alias(self.factory.get('/funnel/')), DEFAULT_DB_ALIAS)
+        self.assertFalse(routers.is_healthy(self.replica))
+
+    def test_replica_failure_mid_request_reruns_on_primary(self):
+        JobPlatformFactory(name='linkedin')
+        connection = connections[self.replica]
+        routers._health[self.replica] = (time.monotonic(), True)
+
+        def view(request):
+            return HttpResponse(','.join(JobPlatform.objects.values_list('name', flat=True)))
+        failure = connection.Database.OperationalError('server closed the connection unexpectedly')
+        with mock.patch.object(connection, 'create_cursor', side_effect=failure):
+            with self.assertLogs('apps.core.routers', 'WARNING'):
+                response = self._middleware(view)(self.factory.get('/funnel/'))
+        self.assertEqual(response.content, b'linkedin')
+        self.assertFalse(routers.is_healthy(self.replica))
+
+    def test_primary_failure_is_not_retried(self):
+        calls = []
+
+        def view(request):
+            calls.append(JobPlatform.objects.count())
+            raise OperationalError('primary went away')
+        response = self._middleware(view)(self.factory.get('/funnel/'))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(calls, [0])
+        self.assertTrue(routers.is_healthy(self.replica))
+
+    def test_async_chain_stays_async(self):
+        async def view(request):
+            return HttpResponse(await sync_to_async(lambda: JobPlatform.objects.all().db)())
+        middleware = routers.ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(self.factory.get('/funnel/'))
+        self.assertEqual(response.content.decode(), self.replica)
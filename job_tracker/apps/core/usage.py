@@ -0,0 +1,277 @@
+"""
+Usage accounting and spend budgets for paid external APIs.
+
+``record`` only bumps an in-process counter. A timer started by the first
+counter of a batch pushes the counters to Redis in one pipeline at most
+``USAGE_PUSH_INTERVAL`` seconds later, and they are pushed again when the
+process exits (``atexit``, or Celery's ``worker_process_shutdown`` for
+prefork children, which skip ``atexit``). In Redis they feed both the
+pending totals that ``flush`` upserts into ``DailyUsage`` rows and the
+per-day and per-month spend hashes read by ``check_budget``. A budget
+check reuses its last spend reading for ``USAGE_BUDGET_REFRESH`` seconds, so
+the hot path touches Redis at most once per interval.
+
+Translations (``TranslationUsage.log_usage``) are also rolled up into one
+``TranslationUsage`` row per service and day by ``flush``.
+
+``flush`` takes each batch out of Redis before writing it to the database
+and puts it back if the write fails, so a batch is never applied twice; a
+flusher killed between the two loses that batch instead.
+"""
+import atexit
+import datetime
+import logging
+import os
+import threading
+import time
+import uuid
+from decimal import Decimal
+from typing import Optional
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.models import DailyUsage, TranslationUsage
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'usage:pending'
+FLUSHING_PREFIX = 'usage:flushing:'
+SPEND_PREFIX = 'usage:spend:'
+TRANSLATION_SERVICES_KEY = 'usage:translation-services'
+METRICS = ('calls', 'units', 'cost')
+
+
+class BudgetExceeded(Exception):
+    """A paid service reached its daily or monthly spending limit"""
+
+    def __init__(self, service: str, period: str, spent: float, limit: float):
+        self.service, self.period, self.spent, self.limit = service, period, spent, limit
+        super().__init__(f"{service} {period} budget exhausted: {spent:.2f} of {limit:.2f}")
+
+
+_lock = threading.Lock()
+_pending: dict[tuple[str, str], list] = {}  # (day, service) -> [calls, units, cost]
+_timer: Optional[threading.Timer] = None
+_translation_services: set[str] = set()
+_spend_cache: dict[str, tuple[float, float, float]] = {}  # service -> (read at, day, month)
+
+
+def _schedule_push() -> None:
+    """Start the push timer unless one is pending; the caller holds ``_lock``"""
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(settings.USAGE_PUSH_INTERVAL, push)
+        _timer.daemon = True
+        _timer.start()
+
+
+def record(service: str, units: int = 0, cost: float = 0, translation: bool = False) -> None:
+    """Count one call to ``service`` consuming ``units`` at ``cost``"""
+    day = timezone.localdate().isoformat()
+    with _lock:
+        if translation:
+            _translation_services.add(service)
+        entry = _pending.setdefault((day, service), [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += units
+        entry[2] += float(cost)
+        _schedule_push()
+
+
+def push(**kwargs) -> None:
+    """Move this process's counters to Redis; also a signal receiver"""
+    global _pending, _timer
+    with _lock:
+        batch, _pending = _pending, {}
+        translation_services = list(_translation_services)
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not batch:
+        return
+
+    pipe = get_redis().pipeline(transaction=False)
+    if translation_services:
+        pipe.sadd(TRANSLATION_SERVICES_KEY, *translation_services)
+    for (day, service), (calls, units, cost) in batch.items():
+        pipe.hincrby(PENDING_KEY, f'{day}|{service}|calls', calls)
+        pipe.hincrby(PENDING_KEY, f'{day}|{service}|units', units)
+        pipe.hincrbyfloat(PENDING_KEY, f'{day}|{service}|cost', cost)
+        for period, ttl in ((day, 3 * 86400), (day[:7], 40 * 86400)):
+            pipe.hincrbyfloat(f'{SPEND_PREFIX}{period}', service, cost)
+            pipe.expire(f'{SPEND_PREFIX}{period}', ttl)
+    try:
+        pipe.execute()
+    except redis.RedisError:
+        logger.warning("Usage store unavailable, keeping %d counters in memory", len(batch))
+        with _lock:
+            for key, values in batch.items():
+                entry = _pending.setdefault(key, [0, 0, 0.0])
+                for index, value in enumerate(values):
+                    entry[index] += value
+            _schedule_push()
+
+
+def _reset_after_fork() -> None:
+    # A forked child must not push its parent's counters a second time.
+    global _lock, _pending, _timer
+    _lock = threading.Lock()
+    _pending, _timer = {}, None
+    _spend_cache.clear()
+    _translation_services.clear()
+
+
+atexit.register(push)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _local_cost(service: str, day: str) -> tuple[float, float]:
+    with _lock:
+        today = sum(cost for (when, name), (_, _, cost) in _pending.items() if name == service and when == day)
+        month = sum(
+            cost for (when, name), (_, _, cost) in _pending.items()
+            if name == service and when[:7] == day[:7]
+        )
+    return today, month
+
+
+def spend(service: str) -> tuple[float, float]:
+    """Spend on ``service`` today and this month, including unpushed counters"""
+    day = timezone.localdate().isoformat()
+    read_at, today, month = _spend_cache.get(service, (0.0, 0.0, 0.0))
+    if time.monotonic() - read_at >= settings.USAGE_BUDGET_REFRESH:
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hget(f'{SPEND_PREFIX}{day}', service)
+            pipe.hget(f'{SPEND_PREFIX}{day[:7]}', service)
+            today, month = (float(value or 0) for value in pipe.execute())
+        except redis.RedisError:
+            # Keep serving the last reading rather than blocking every call.
+            logger.warning("Usage store unavailable, using cached spend for %s", service)
+        _spend_cache[service] = (time.monotonic(), today, month)
+    local_today, local_month = _local_cost(service, day)
+    return today + local_today, month + local_month
+
+
+def check_budget(service: str) -> None:
+    """Raise ``BudgetExceeded`` when ``service`` has used up a configured limit"""
+    limits = settings.USAGE_BUDGETS.get(service)
+    if not limits:
+        return
+    today, month = spend(service)
+    if limits.get('daily') and today >= limits['daily']:
+        raise BudgetExceeded(service, 'daily', today, limits['daily'])
+    if limits.get('monthly') and month >= limits['monthly']:
+        raise BudgetExceeded(service, 'monthly', month, limits['monthly'])
+
+
+def _totals(stored: dict) -> dict[tuple[str, str], dict[str, str]]:
+    totals: dict[tuple[str, str], dict[str, str]] = {}
+    for field, value in stored.items():
+        day, service, metric = field.decode().split('|')
+        totals.setdefault((day, service), dict.fromkeys(METRICS, '0'))[metric] = value.decode()
+    return totals
+
+
+def _take(client: redis.Redis, key: str) -> dict:
+    """Read and delete the hash ``key`` in one transaction"""
+    pipe = client.pipeline(transaction=True)
+    pipe.hgetall(key)
+    pipe.delete(key)
+    stored, _ = pipe.execute()
+    return stored
+
+
+def _requeue(client: redis.Redis, stored: dict) -> None:
+    pipe = client.pipeline(transaction=False)
+    for field, value in stored.items():
+        pipe.hincrbyfloat(PENDING_KEY, field, float(value))
+    pipe.execute()
+
+
+def flush() -> int:
+    """
+    Upsert pending Redis counters into ``DailyUsage`` (and ``TranslationUsage``
+    for translation services) and return the ``DailyUsage`` rows touched.
+
+    Counters of other processes reach Redis on their own push timers; only
+    this process's are pushed here.
+    """
+    push()
+    client = get_redis()
+    batch_key = f'{FLUSHING_PREFIX}{uuid.uuid4().hex}'
+    try:
+        client.rename(PENDING_KEY, batch_key)
+    except redis.ResponseError:
+        pass  # Nothing pending since the last flush
+    # Batches left behind by an interrupted flush are picked up as well.
+    keys = [key.decode() for key in client.scan_iter(f'{FLUSHING_PREFIX}*')]
+    translation_services = {service.decode() for service in client.smembers(TRANSLATION_SERVICES_KEY)}
+
+    touched = 0
+    for key in keys:
+        stored = _take(client, key)
+        try:
+            with transaction.atomic():
+                for (day, service), values in _totals(stored).items():
+                    DailyUsage.objects.get_or_create(service=service, date=day)
+                    DailyUsage.objects.filter(service=service, date=day).update(
+                        calls=F('calls') + int(float(values['calls'])),
+                        units=F('units') + int(float(values['units'])),
+                        cost=F('cost') + Decimal(values['cost']).quantize(Decimal('0.0001')),
+                    )
+                    if service in translation_services:
+                        TranslationUsage.objects.get_or_create(
+                            service_name=service, date=day, defaults={'character_count': 0},
+                        )
+                        TranslationUsage.objects.filter(service_name=service, date=day).update(
+                            character_count=F('character_count') + int(float(values['units'])),
+                            cost=F('cost') + Decimal(values['cost']).quantize(Decimal('0.0001')),
+                        )
+                    touched += 1
+        except Exception:
+            _requeue(client, stored)
+            raise
+    return touched
+
+
+def spend_summary(days: int = 30, today: Optional[datetime.date] = None) -> dict:
+    """Per-day totals from ``DailyUsage`` plus live spend for today and this month"""
+    today = today or timezone.localdate()
+    rows = DailyUsage.objects.filter(date__gt=today - datetime.timedelta(days=days)).values(
+        'date', 'service', 'calls', 'units', 'cost',
+    )
+    days = [
+        {**row, 'date': row['date'].isoformat(), 'cost': float(row['cost'])}
+        for row in rows.order_by('date', 'service')
+    ]
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hgetall(f'{SPEND_PREFIX}{today.isoformat()}')
+        pipe.hgetall(f'{SPEND_PREFIX}{today.isoformat()[:7]}')
+        current_day, current_month = pipe.execute()
+        current_day = {service.decode(): float(cost) for service, cost in current_day.items()}
+        current_month = {service.decode(): float(cost) for service, cost in current_month.items()}
+        live = True
+    except redis.RedisError:
+        # Flushed totals only, without the last few minutes.
+        logger.warning("Usage store unavailable, summarising flushed totals")
+        current_day, current_month, live = {}, {}, False
+        for row in DailyUsage.objects.filter(date__gte=today.replace(day=1), date__lte=today).values(
+            'date', 'service', 'cost',
+        ):
+            current_month[row['service']] = current_month.get(row['service'], 0.0) + float(row['cost'])
+            if row['date'] == today:
+                current_day[row['service']] = float(row['cost'])
+    return {
+        'days': days,
+        'today': current_day,
+        'month': current_month,
+        'live': live,
+        'budgets': settings.USAGE_BUDGETS,
+    }
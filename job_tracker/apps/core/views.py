@@ -1,3 +1,20 @@
+import redis
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from apps.core.instrumentation import render_metrics
+
+
+@require_GET
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Prometheus exposition of request and task instrumentation"""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    try:
+        body = render_metrics()
+    except redis.RedisError:
+        return HttpResponse('Metrics store unavailable\n', status=503, content_type='text/plain')
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.core.benchmarking import benchmark
+from apps.dashboard import funnel
+from apps.jobs.models import Application, Job
+
+
+@benchmark('dashboard_render')
+def dashboard_render() -> None:
+    """The aggregate and list queries behind the dashboard widgets"""
+    week_ago = timezone.now() - timedelta(days=7)
+    list(Application.objects.values('status').annotate(total=Count('id')))
+    Job.objects.filter(scraped_date__gte=week_ago).count()
+    Application.objects.filter(applied_date__gte=week_ago).count()
+    recent = Application.objects.select_related('job', 'job__platform')[:10]
+    [str(application) for application in recent]
+
+
+@benchmark('funnel_charts')
+def funnel_charts() -> int:
+    """Overall and per-platform funnels plus monthly cohorts from the aggregates"""
+    stages = funnel.funnel()
+    for platform in funnel.top_segments('platform'):
+        stages += funnel.funnel('platform', platform)
+    return len(stages) + len(funnel.cohorts())
@@ -0,0 +1,71 @@
+"""
+Dashboard event bus over Redis pub/sub.
+
+Producers (ingest, email sync, application status changes) publish small
+JSON deltas; every open dashboard holds one Server-Sent Events stream that
+relays them, so idle tabs cost a Redis subscription instead of polling the
+aggregate queries.
+
+Django 4.2 does not notice a client disconnecting from a streaming
+response, so a closed tab's stream would otherwise run, and hold its
+subscription, forever. Streams therefore end after
+``DASHBOARD_EVENTS_MAX_AGE`` seconds and EventSource reconnects after the
+``retry`` delay.
+"""
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'dashboard:events'
+
+
+def publish(event: str, data: dict) -> None:
+    """Send one delta to every connected dashboard"""
+    message = json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder)
+    try:
+        get_redis().publish(CHANNEL, message)
+    except redis.RedisError:
+        logger.warning("Could not publish dashboard event %s", event)
+
+
+def format_event(event: str, data: str) -> bytes:
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+async def stream() -> AsyncIterator[bytes]:
+    """Relay published deltas as SSE frames, with keep-alive comments, for at most ``DASHBOARD_EVENTS_MAX_AGE``"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.DASHBOARD_EVENTS_MAX_AGE
+    client = aioredis.from_url(settings.REDIS_URL)
+    pubsub = client.pubsub()
+    await pubsub.subscribe(CHANNEL)
+    try:
+        yield b'retry: 5000\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=min(settings.DASHBOARD_EVENTS_KEEPALIVE, remaining),
+            )
+            if message is None:
+                yield b': keep-alive\n\n'
+                continue
+            payload = json.loads(message['data'])
+            yield format_event(payload['event'], json.dumps(payload['data']))
+    finally:
+        # Runs when the stream reaches its age limit, when Redis fails and
+        # when the server closes the generator, so the connection is released.
+        try:
+            await pubsub.unsubscribe(CHANNEL)
+        except redis.RedisError:
+            logger.debug("Could not unsubscribe from %s", CHANNEL)
+        await pubsub.close()
+        await client.close()
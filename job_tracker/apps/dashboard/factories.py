@@ -0,0 +1,18 @@
+import random
+
+import factory
+from factory.django import DjangoModelFactory
+
+from apps.dashboard.models import AnalyticsEvent
+
+
+class AnalyticsEventFactory(DjangoModelFactory):
+    class Meta:
+        model = AnalyticsEvent
+
+    event_type = factory.LazyFunction(lambda: random.choices(
+        [choice for choice, _ in AnalyticsEvent.EVENT_TYPES], weights=[60, 10, 10, 10, 10],
+    )[0])
+    data = factory.LazyFunction(lambda: {'job_id': random.randrange(1, 1_000_000)})
+    ip_address = factory.Faker('ipv4')
+    user_agent = factory.Faker('user_agent')
@@ -0,0 +1,183 @@
+"""
+Application funnel and cohort aggregates, maintained per status transition.
+
+Each ``ApplicationStatusChange`` adjusts the ``FunnelStage`` rows of the
+segments the application belongs to (all applications, its platform, target
+language and company) and its monthly ``CohortStage`` with ``F()``
+increments, inside the transaction that recorded the change; deleting an
+application takes its transitions back out. Reading a funnel therefore
+touches one row per status however many applications are tracked.
+``rebuild`` recomputes everything from the log.
+"""
+import datetime
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.core.partitioning import add_months, month_start
+from apps.dashboard.models import CohortStage, FunnelStage
+from apps.jobs.models import Application, ApplicationStatusChange, Job
+
+STAGES = [status for status, _ in Application.STATUS_CHOICES]
+TOTALS = ('reached', 'current', 'exits', 'seconds_in_stage')
+FUNNEL = ['applied', 'interview_scheduled', 'interviewed', 'accepted']
+DIMENSIONS = ('all', 'platform', 'language', 'company')
+
+
+def _month(value: datetime.datetime) -> datetime.date:
+    return month_start(timezone.localtime(value).date())
+
+
+def segments(application: Application) -> list[tuple[str, str]]:
+    """``(dimension, value)`` pairs whose funnels include ``application``"""
+    company, profile, platform = Job.objects.filter(pk=application.job_id).values_list(
+        'company', 'company_profile__name', 'platform__name',
+    ).get()
+    return [
+        ('all', ''),
+        ('platform', platform),
+        ('language', application.target_language),
+        ('company', profile or company),
+    ]
+
+
+def _increment(model, keys: list[dict], **amounts: int) -> None:
+    model.objects.bulk_create([model(**key) for key in keys], ignore_conflicts=True)
+    changes = {field: F(field) + amount for field, amount in amounts.items() if amount}
+    if changes:
+        model.objects.filter(reduce(or_, (Q(**key) for key in keys))).update(**changes)
+
+
+def apply(application: Application, change: ApplicationStatusChange) -> None:
+    """Fold one status transition into the funnel and cohort aggregates"""
+    keys = segments(application)
+    first_time = not ApplicationStatusChange.objects.filter(
+        application_id=application.pk, to_status=change.to_status,
+    ).exclude(pk=change.pk).exists()
+
+    _increment(
+        FunnelStage, [{'dimension': d, 'value': v, 'stage': change.to_status} for d, v in keys],
+        current=1, reached=int(first_time),
+    )
+    if change.from_status:
+        seconds = int(change.time_in_previous.total_seconds()) if change.time_in_previous else 0
+        _increment(
+            FunnelStage, [{'dimension': d, 'value': v, 'stage': change.from_status} for d, v in keys],
+            current=-1, exits=1, seconds_in_stage=seconds,
+        )
+    if first_time:
+        _increment(CohortStage, [{'cohort': _month(application.created_at), 'stage': change.to_status}], reached=1)
+
+
+def _fold(stages: dict, keys: list[tuple[str, str]], from_status: str, to_status: str,
+          spent: Optional[datetime.timedelta], first_time: bool) -> None:
+    """Add one transition to per-``(dimension, value, stage)`` totals"""
+    for dimension, value in keys:
+        entered = stages[(dimension, value, to_status)]
+        entered['current'] += 1
+        entered['reached'] += first_time
+        if from_status:
+            left = stages[(dimension, value, from_status)]
+            left['current'] -= 1
+            left['exits'] += 1
+            left['seconds_in_stage'] += int(spent.total_seconds()) if spent else 0
+
+
+def remove(application: Application) -> None:
+    """Take a deleted application's transitions back out of the funnel and cohort aggregates"""
+    keys = segments(application)
+    stages: dict[tuple, dict] = defaultdict(lambda: dict.fromkeys(TOTALS, 0))
+    reached: set[str] = set()
+    for from_status, to_status, spent in ApplicationStatusChange.objects.filter(
+        application_id=application.pk,
+    ).order_by('changed_at', 'pk').values_list('from_status', 'to_status', 'time_in_previous'):
+        _fold(stages, keys, from_status, to_status, spent, to_status not in reached)
+        reached.add(to_status)
+
+    for (dimension, value, stage), totals in stages.items():
+        _increment(
+            FunnelStage, [{'dimension': dimension, 'value': value, 'stage': stage}],
+            **{field: -amount for field, amount in totals.items()},
+        )
+    if reached:
+        cohort = _month(application.created_at)
+        _increment(CohortStage, [{'cohort': cohort, 'stage': stage} for stage in reached], reached=-1)
+
+
+def funnel(dimension: str = 'all', value: str = '') -> list[dict]:
+    """Per-status totals of one segment, with conversion from ``applied``"""
+    rows = {row.stage: row for row in FunnelStage.objects.filter(dimension=dimension, value=value)}
+    top = rows[FUNNEL[0]].reached if FUNNEL[0] in rows else 0
+    result = []
+    for stage, label in Application.STATUS_CHOICES:
+        row = rows.get(stage) or FunnelStage(stage=stage)
+        result.append({
+            'stage': stage,
+            'label': label,
+            'reached': row.reached,
+            'current': row.current,
+            'conversion': row.reached / top if top and stage != 'not_applied' else None,
+            'avg_days_in_stage': row.seconds_in_stage / row.exits / 86400 if row.exits else None,
+        })
+    return result
+
+
+def top_segments(dimension: str, limit: int = 10) -> list[str]:
+    """Values of ``dimension`` with the most applications sent"""
+    return list(
+        FunnelStage.objects.filter(dimension=dimension, stage=FUNNEL[0])
+        .order_by('-reached').values_list('value', flat=True)[:limit]
+    )
+
+
+def cohorts(months: int = 12, today: Optional[datetime.date] = None) -> list[dict]:
+    """Statuses reached by applications created in each of the last ``months`` months"""
+    today = today or timezone.localdate()
+    first = add_months(month_start(today), 1 - months)
+    by_cohort: dict[datetime.date, dict] = defaultdict(lambda: dict.fromkeys(STAGES, 0))
+    for cohort, stage, reached in CohortStage.objects.filter(cohort__gte=first).values_list(
+        'cohort', 'stage', 'reached',
+    ):
+        by_cohort[cohort][stage] = reached
+    return [{'cohort': cohort.strftime('%Y-%m'), **by_cohort[cohort]} for cohort in sorted(by_cohort)]
+
+
+def rebuild() -> int:
+    """Recompute all funnel and cohort aggregates from the transition log"""
+    stages: dict[tuple, dict] = defaultdict(lambda: dict.fromkeys(TOTALS, 0))
+    cohort_counts: dict[tuple, int] = defaultdict(int)
+    reached: set[tuple[int, str]] = set()
+
+    changes = ApplicationStatusChange.objects.order_by('application_id', 'changed_at', 'pk').values_list(
+        'application_id', 'from_status', 'to_status', 'time_in_previous', 'application__created_at',
+        'application__target_language', 'application__job__company', 'application__job__company_profile__name',
+        'application__job__platform__name',
+    )
+    count = 0
+    for row in changes.iterator():
+        application_id, from_status, to_status, spent, created_at, language, company, profile, platform = row
+        keys = [('all', ''), ('platform', platform), ('language', language), ('company', profile or company)]
+        first_time = (application_id, to_status) not in reached
+        reached.add((application_id, to_status))
+        _fold(stages, keys, from_status, to_status, spent, first_time)
+        if first_time:
+            cohort_counts[(_month(created_at), to_status)] += 1
+        count += 1
+
+    with transaction.atomic():
+        FunnelStage.objects.all().delete()
+        CohortStage.objects.all().delete()
+        FunnelStage.objects.bulk_create([
+            FunnelStage(dimension=dimension, value=value, stage=stage, **totals)
+            for (dimension, value, stage), totals in stages.items()
+        ], batch_size=1000)
+        CohortStage.objects.bulk_create([
+            CohortStage(cohort=cohort, stage=stage, reached=total)
+            for (cohort, stage), total in cohort_counts.items()
+        ], batch_size=1000)
+    return count
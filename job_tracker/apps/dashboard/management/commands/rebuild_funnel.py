@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.dashboard import funnel
+from apps.jobs import history
+from apps.jobs.models import Application
+
+
+class Command(BaseCommand):
+    help = "Recompute the application funnel and cohort aggregates from the status history"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reconstruct', action='store_true',
+                            help="First log the usual status path for applications without any history")
+
+    def handle(self, *args, **options):
+        if options['reconstruct']:
+            logged = history.reconstruct(Application.objects.filter(status_changes__isnull=True))
+            self.stdout.write(f"Reconstructed {logged} status changes")
+        count = funnel.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt funnel from {count} status changes"))
@@ -75,3 +75,46 @@ class AnalyticsEvent(models.Model):
 
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.created_at}"
+
+
+class FunnelStage(models.Model):
+    """Running totals for one application status within one funnel segment"""
+    DIMENSIONS = [
+        ('all', 'All applications'),
+        ('platform', 'Platform'),
+        ('language', 'Language'),
+        ('company', 'Company'),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS)
+    value = models.CharField(max_length=100, blank=True)  # Platform name, language code or company
+    stage = models.CharField(max_length=20)  # Application status
+    reached = models.PositiveIntegerField(default=0)  # Applications that ever reached the stage
+    current = models.IntegerField(default=0)  # Applications currently in the stage
+    exits = models.PositiveIntegerField(default=0)  # Transitions out of the stage
+    seconds_in_stage = models.BigIntegerField(default=0)  # Summed over those exits
+
+    class Meta:
+        unique_together = ['dimension', 'value', 'stage']
+        verbose_name = _("Funnel Stage")
+        verbose_name_plural = _("Funnel Stages")
+        ordering = ['dimension', 'value', 'stage']
+
+    def __str__(self):
+        return f"{self.dimension}={self.value or '*'} {self.stage}: {self.reached}"
+
+
+class CohortStage(models.Model):
+    """Applications created in one month that reached a given status"""
+    cohort = models.DateField()  # First day of the month the application was created
+    stage = models.CharField(max_length=20)
+    reached = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['cohort', 'stage']
+        verbose_name = _("Cohort Stage")
+        verbose_name_plural = _("Cohort Stages")
+        ordering = ['-cohort', 'stage']
+
+    def __str__(self):
+        return f"{self.cohort:%Y-%m} {self.stage}: {self.reached}"
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from apps.dashboard import events, funnel
+from apps.jobs.models import Application
+from apps.jobs.signals import application_status_changed
+
+
+@receiver(application_status_changed)
+def publish_status_change(sender, instance, previous_status, **kwargs):
+    delta = {
+        'application': instance.pk,
+        'job': instance.job_id,
+        'from': previous_status,
+        'to': instance.status,
+    }
+    transaction.on_commit(lambda: events.publish('application_status', delta))
+
+
+@receiver(application_status_changed)
+def update_funnel(sender, instance, change, **kwargs):
+    funnel.apply(instance, change)
+
+
+@receiver(pre_delete, sender=Application)
+def remove_from_funnel(sender, instance, **kwargs):
+    # Before the cascade removes the transitions the counts are built from.
+    funnel.remove(instance)
@@ -0,0 +1,41 @@
+/*
+ * Applies dashboard deltas pushed over /live/ without re-querying.
+ *
+ * Counters are elements with data-live-count="status:<status>",
+ * "jobs_matched" or "emails_synced"; they are adjusted in place. Every
+ * delta is also re-dispatched on document as a "dashboard:<event>"
+ * CustomEvent so HTMX widgets can react (hx-trigger="dashboard:jobs_matched from:document").
+ */
+(function () {
+  'use strict';
+
+  function adjust(key, amount) {
+    document.querySelectorAll('[data-live-count="' + key + '"]').forEach(function (element) {
+      element.textContent = String((parseInt(element.textContent, 10) || 0) + amount);
+    });
+  }
+
+  var handlers = {
+    application_status: function (delta) {
+      if (delta.from) {
+        adjust('status:' + delta.from, -1);
+      }
+      adjust('status:' + delta.to, 1);
+    },
+    jobs_matched: function (delta) {
+      adjust('jobs_matched', delta.count);
+    },
+    emails_synced: function (delta) {
+      adjust('emails_synced', delta.count);
+    }
+  };
+
+  var source = new EventSource(document.body.dataset.liveUrl || '/live/');
+  Object.keys(handlers).forEach(function (name) {
+    source.addEventListener(name, function (message) {
+      var delta = JSON.parse(message.data);
+      handlers[name](delta);
+      document.dispatchEvent(new CustomEvent('dashboard:' + name, {detail: delta}));
+    });
+  });
+})();
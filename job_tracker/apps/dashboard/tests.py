@@ -1,3 +1,99 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.core.factories import JobPlatformFactory
+from apps.dashboard import events, funnel
+from apps.jobs.factories import ApplicationFactory, JobFactory
+from apps.jobs.models import Application
+
+
+class FunnelTests(TestCase):
+    def setUp(self):
+        self.job = JobFactory(platform=JobPlatformFactory(name='linkedin'), company='Acme')
+
+    def _stages(self, dimension='all', value=''):
+        return {row['stage']: row for row in funnel.funnel(dimension, value)}
+
+    def test_transitions_update_every_segment(self):
+        application = ApplicationFactory(job=self.job, status='not_applied', target_language='de')
+        application.status = 'applied'
+        application.save()
+        ApplicationFactory(job=self.job, status='not_applied')
+
+        for dimension, value in (('all', ''), ('platform', 'linkedin'), ('language', 'de')):
+            stages = self._stages(dimension, value)
+            self.assertEqual(stages['applied']['reached'], 1)
+            self.assertEqual(stages['applied']['current'], 1)
+        stages = self._stages()
+        self.assertEqual((stages['not_applied']['reached'], stages['not_applied']['current']), (2, 1))
+        self.assertEqual(stages['applied']['conversion'], 1.0)
+
+    def test_revisited_stage_counts_once_as_reached(self):
+        application = ApplicationFactory(job=self.job, status='applied')
+        for status in ('interview_scheduled', 'applied', 'interview_scheduled'):
+            application.status = status
+            application.save()
+        stages = self._stages()
+        self.assertEqual(stages['interview_scheduled']['reached'], 1)
+        self.assertEqual(stages['interview_scheduled']['current'], 1)
+        self.assertEqual(stages['applied']['current'], 0)
+        self.assertEqual(stages['applied']['conversion'], 1.0)
+
+    def test_rebuild_matches_incremental_totals(self):
+        for status in ('applied', 'interviewed', 'rejected'):
+            application = ApplicationFactory(job=self.job, status='not_applied')
+            application.status = status
+            application.save()
+        Application.objects.all().set_status('accepted')
+        before = funnel.funnel(), funnel.cohorts()
+        funnel.rebuild()
+        self.assertEqual((funnel.funnel(), funnel.cohorts()), before)
+        self.assertEqual(self._stages()['accepted']['current'], 3)
+
+
+    def test_deleting_an_application_takes_it_out(self):
+        kept = ApplicationFactory(job=self.job, status='applied')
+        deleted = ApplicationFactory(job=self.job, status='not_applied')
+        for status in ('applied', 'interview_scheduled'):
+            deleted.status = status
+            deleted.save()
+        deleted.delete()
+
+        stages = self._stages()
+        self.assertEqual((stages['applied']['reached'], stages['applied']['current']), (1, 1))
+        self.assertEqual(stages['interview_scheduled']['current'], 0)
+        before = funnel.funnel(), funnel.funnel('platform', 'linkedin'), funnel.cohorts()
+        funnel.rebuild()
+        self.assertEqual((funnel.funnel(), funnel.funnel('platform', 'linkedin'), funnel.cohorts()), before)
+        self.assertTrue(Application.objects.filter(pk=kept.pk).exists())
+
+
+class FunnelViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+
+    def test_unknown_dimension_is_rejected(self):
+        response = self.client.get(reverse('dashboard:funnel_data'), {'dimension': 'salary'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_known_dimension(self):
+        response = self.client.get(reverse('dashboard:funnel_data'), {'dimension': 'platform'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['dimension'], 'platform')
+
+
+@override_settings(DASHBOARD_EVENTS_KEEPALIVE=0.05, DASHBOARD_EVENTS_MAX_AGE=0.2)
+class StreamTests(SimpleTestCase):
+    def test_stream_ends_after_max_age(self):
+        async def collect():
+            return [frame async for frame in events.stream()]
+        with mock.patch.object(events.aioredis, 'from_url', return_value=fakeredis.aioredis.FakeRedis()):
+            frames = async_to_sync(collect)()
+        self.assertEqual(frames[0], b'retry: 5000\n\n')
+        self.assertIn(b': keep-alive\n\n', frames)
+        self.assertLess(len(frames), 10)
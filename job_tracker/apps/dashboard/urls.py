@@ -0,0 +1,11 @@
+from django.urls import path
+
+from apps.dashboard import views
+
+app_name = 'dashboard'
+
+urlpatterns = [
+    path('live/', views.live_updates, name='live_updates'),
+    path('usage/', views.usage_summary, name='usage_summary'),
+    path('funnel/', views.funnel_data, name='funnel_data'),
+]
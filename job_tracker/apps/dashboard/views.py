@@ -1,3 +1,42 @@
+from asgiref.sync import sync_to_async
+from django.http import (
+    HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render
 
-# Create your views here.
+from apps.core import usage
+from apps.dashboard import events, funnel
+
+
+async def live_updates(request: HttpRequest) -> HttpResponse:
+    """Server-Sent Events stream of dashboard deltas, served by the ASGI app"""
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return HttpResponseForbidden()
+    response = StreamingHttpResponse(events.stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def usage_summary(request: HttpRequest) -> HttpResponse:
+    """Daily API spend for the last 30 days with live totals and budgets"""
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    return JsonResponse(usage.spend_summary())
+
+
+def funnel_data(request: HttpRequest) -> HttpResponse:
+    """Funnel for one segment (``?dimension=platform&value=linkedin``) and monthly cohorts"""
+    if not request.user.is_authenticated:
+        return HttpResponseForbidden()
+    dimension = request.GET.get('dimension', 'all')
+    if dimension not in funnel.DIMENSIONS:
+        return HttpResponseBadRequest(f"dimension must be one of {', '.join(funnel.DIMENSIONS)}")
+    return JsonResponse({
+        'dimension': dimension,
+        'value': request.GET.get('value', ''),
+        'stages': funnel.funnel(dimension, request.GET.get('value', '')),
+        'segments': funnel.top_segments(dimension) if dimension != 'all' else [],
+        'cohorts': funnel.cohorts(),
+    })
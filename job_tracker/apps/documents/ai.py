@@ -0,0 +1,62 @@
+"""
+OpenAI provider for document generation.
+
+The SDK is imported and the client built on first use, so processes that
+never generate documents do not pay for the import. Every completion is
+checked against the ``openai`` budget first and its token cost is counted
+with ``apps.core.usage``.
+"""
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+
+from apps.core import usage
+from apps.core.lazy import lazy_import
+
+openai = lazy_import('openai')
+
+logger = logging.getLogger(__name__)
+
+SERVICE = 'openai'
+DEFAULT_MODEL = 'gpt-4'
+
+# USD per 1K prompt and completion tokens
+TOKEN_PRICES = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+}
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """Shared OpenAI client, created on first call"""
+    return openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str = DEFAULT_MODEL, temperature: float = 0.7):
+    """LangChain chat model for prompt chains, created on first call"""
+    from langchain.chat_models import ChatOpenAI
+
+    return ChatOpenAI(model_name=model, temperature=temperature, openai_api_key=settings.OPENAI_API_KEY)
+
+
+def token_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = TOKEN_PRICES.get(model, TOKEN_PRICES[DEFAULT_MODEL])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def complete(messages: list[dict], model: str = DEFAULT_MODEL, **options) -> tuple[str, int]:
+    """
+    Run a chat completion and return ``(text, total tokens used)``.
+
+    Raises ``usage.BudgetExceeded`` without calling the API once the daily
+    or monthly OpenAI budget is spent.
+    """
+    usage.check_budget(SERVICE)
+    response = get_client().chat.completions.create(model=model, messages=messages, **options)
+    tokens = response.usage
+    usage.record(SERVICE, tokens.total_tokens, token_cost(model, tokens.prompt_tokens, tokens.completion_tokens))
+    return response.choices[0].message.content, tokens.total_tokens
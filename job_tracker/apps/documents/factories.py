@@ -0,0 +1,28 @@
+import random
+
+import factory
+from factory.django import DjangoModelFactory
+
+from apps.core.factories import faker_for
+from apps.documents.models import DocumentVersion, GeneratedDocument
+from apps.jobs.factories import ApplicationFactory
+
+
+class GeneratedDocumentFactory(DjangoModelFactory):
+    class Meta:
+        model = GeneratedDocument
+
+    application = factory.SubFactory(ApplicationFactory)
+    document_type = factory.LazyFunction(lambda: random.choice(['cv', 'cover_letter']))
+    language = factory.SelfAttribute('application.target_language')
+    content = factory.LazyAttribute(lambda o: faker_for(o.language).text(max_nb_chars=2000))
+
+
+class DocumentVersionFactory(DjangoModelFactory):
+    class Meta:
+        model = DocumentVersion
+
+    document = factory.SubFactory(GeneratedDocumentFactory)
+    version_number = factory.Sequence(lambda n: n + 1)
+    content = factory.LazyAttribute(lambda o: faker_for(o.document.language).text(max_nb_chars=2000))
+    changes_summary = factory.LazyAttribute(lambda o: faker_for(o.document.language).sentence())
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from apps.core.querysets import TimeRangeQuerySet
 from apps.jobs.models import Application
 
 
@@ -62,6 +63,9 @@ class AIGenerationLog(models.Model):
     error_message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    partition_field = 'created_at'
+    objects = TimeRangeQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("AI Generation Log")
         verbose_name_plural = _("AI Generation Logs")
@@ -0,0 +1,20 @@
+from django.utils import timezone
+
+from apps.core.benchmarking import benchmark
+from apps.integrations.factories import EmailFactory
+from apps.integrations.models import Email, EmailThread
+
+SYNC_THREADS = 50
+EMAILS_PER_THREAD = 4
+
+
+@benchmark('email_sync')
+def email_sync() -> int:
+    """Store a sync run's worth of new messages and touch their threads"""
+    threads = list(
+        EmailThread.objects.select_related('application__job').order_by('-updated_at')[:SYNC_THREADS]
+    )
+    emails = [EmailFactory.build(thread=thread) for thread in threads for _ in range(EMAILS_PER_THREAD)]
+    Email.objects.bulk_create(emails)
+    EmailThread.objects.filter(pk__in=[thread.pk for thread in threads]).update(updated_at=timezone.now())
+    return len(emails)
@@ -0,0 +1,124 @@
+"""Import new IMAP messages that belong to known application threads"""
+import email
+import imaplib
+import logging
+from datetime import timedelta
+from email import policy
+from email.message import Message
+from email.utils import getaddresses, parsedate_to_datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.dashboard import events
+from apps.integrations.models import Email, EmailAccount
+
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH = 100
+
+
+def _body(message: Message) -> str:
+    for part in message.walk() if message.is_multipart() else [message]:
+        if part.get_content_type() == 'text/plain':
+            payload = part.get_payload(decode=True) or b''
+            return payload.decode(part.get_content_charset() or 'utf-8', errors='replace')
+    return ''
+
+
+def _fetch_messages(account: EmailAccount, since) -> list[Message]:
+    with imaplib.IMAP4_SSL(account.imap_server, timeout=settings.EMAIL_SYNC_IMAP_TIMEOUT) as client:
+        client.login(account.email, account.password)
+        client.select('INBOX', readonly=True)
+        _, data = client.search(None, 'SINCE', since.strftime('%d-%b-%Y'))
+        ids = data[0].split()
+        messages = []
+        for start in range(0, len(ids), FETCH_BATCH):
+            _, parts = client.fetch(b','.join(ids[start:start + FETCH_BATCH]), '(RFC822)')
+            messages.extend(
+                email.message_from_bytes(part[1], policy=policy.default) for part in parts if isinstance(part, tuple)
+            )
+    return messages
+
+
+def _address(value: str) -> str:
+    # Domains are case-insensitive and mail clients rarely vary the local part by case.
+    return value.strip().lower()
+
+
+def _store(emails: list[Email]) -> list[Email]:
+    """Insert ``emails``, leaving out any stored meanwhile by a sync of another account"""
+    try:
+        with transaction.atomic():
+            return Email.objects.bulk_create(emails)
+    except IntegrityError:
+        existing = set(Email.objects.filter(
+            message_id__in=[item.message_id for item in emails],
+        ).values_list('message_id', flat=True))
+    # One at a time, so a key still reserved by an archived email (see
+    # apps.core.partitioning) skips that message instead of failing every sync.
+    stored = []
+    for item in emails:
+        if item.message_id in existing:
+            continue
+        try:
+            with transaction.atomic():
+                item.save(force_insert=True)
+        except IntegrityError as exc:
+            logger.warning("Skipping email %s, its message id is taken: %s", item.message_id, exc)
+            continue
+        stored.append(item)
+    return stored
+
+
+def sync_account(account: EmailAccount) -> list[Email]:
+    """Store replies to tracked threads received since the last sync"""
+    started = timezone.now()
+    since = account.last_synced_at or started - timedelta(days=settings.EMAIL_SYNC_INITIAL_DAYS)
+    messages = [message for message in _fetch_messages(account, since) if message.get('Message-ID')]
+
+    message_ids = {message['Message-ID'].strip() for message in messages}
+    references = {
+        reference
+        for message in messages
+        for reference in f"{message.get('In-Reply-To', '')} {message.get('References', '')}".split()
+    }
+    known = set(Email.objects.filter(message_id__in=message_ids).values_list('message_id', flat=True))
+    thread_ids = dict(Email.objects.filter(message_id__in=references).values_list('message_id', 'thread_id'))
+
+    own_address = _address(account.email)
+    emails: dict[str, Email] = {}
+    for message in messages:
+        message_id = message['Message-ID'].strip()
+        reply_to = f"{message.get('In-Reply-To', '')} {message.get('References', '')}".split()
+        thread_id = next((thread_ids[ref] for ref in reversed(reply_to) if ref in thread_ids), None)
+        if message_id in known or message_id in emails or thread_id is None:
+            continue
+        sender = _address(getaddresses([message.get('From', '')])[0][1])
+        emails[message_id] = Email(
+            thread_id=thread_id,
+            message_id=message_id,
+            sender=sender,
+            recipients=[_address(address) for _, address in getaddresses(message.get_all('To', []))],
+            subject=(message.get('Subject') or '')[:255],
+            content=_body(message),
+            email_type='outbound_manual' if sender == own_address else 'inbound',
+            sent_at=parsedate_to_datetime(message['Date']) if message.get('Date') else started,
+        )
+
+    # Existing messages are left out above, so every returned row is new.
+    created = _store(list(emails.values()))
+    account.last_synced_at = started
+    account.save(update_fields=['last_synced_at'])
+    logger.info("Synced %s: %d new emails", account.email, len(created))
+    if created:
+        events.publish('emails_synced', {
+            'account': account.email,
+            'count': len(created),
+            'emails': [
+                {'thread': stored.thread_id, 'subject': stored.subject, 'sender': stored.sender}
+                for stored in created[:settings.DASHBOARD_EVENTS_MAX_ITEMS]
+            ],
+        })
+    return created
@@ -0,0 +1,40 @@
+import random
+import uuid
+from datetime import timedelta
+
+import factory
+from factory.django import DjangoModelFactory
+
+from apps.core.factories import faker_for
+from apps.integrations.models import Email, EmailThread
+from apps.jobs.factories import ApplicationFactory
+
+
+class EmailThreadFactory(DjangoModelFactory):
+    class Meta:
+        model = EmailThread
+
+    application = factory.SubFactory(ApplicationFactory)
+    thread_id = factory.LazyFunction(lambda: uuid.uuid4().hex)
+    subject = factory.LazyAttribute(lambda o: f'{o.application.job.title} - {o.application.job.company}'[:255])
+    participants = factory.LazyAttribute(
+        lambda o: [faker_for(o.application.target_language).email() for _ in range(2)]
+    )
+
+
+class EmailFactory(DjangoModelFactory):
+    class Meta:
+        model = Email
+
+    thread = factory.SubFactory(EmailThreadFactory)
+    message_id = factory.LazyFunction(lambda: f'<{uuid.uuid4().hex}@mail.example>')
+    sender = factory.LazyAttribute(lambda o: o.thread.participants[0])
+    recipients = factory.LazyAttribute(lambda o: o.thread.participants[1:])
+    subject = factory.LazyAttribute(lambda o: f'Re: {o.thread.subject}'[:255])
+    content = factory.LazyAttribute(
+        lambda o: faker_for(o.thread.application.target_language).paragraph(nb_sentences=6)
+    )
+    email_type = factory.LazyFunction(lambda: random.choice(['inbound', 'outbound_manual', 'outbound_auto']))
+    sent_at = factory.LazyAttribute(
+        lambda o: o.thread.application.job.posted_date + timedelta(hours=random.randrange(1, 24 * 30))
+    )
@@ -0,0 +1,85 @@
+"""
+Glassdoor employer lookups for the company rating cache.
+
+One ``GlassdoorClient`` reuses a single HTTP session for a whole batch and
+spaces requests to stay within ``GLASSDOOR_REQUESTS_PER_MINUTE``; the
+refresh task runs under a cluster-wide lock, so the limit holds across
+workers. Credentials come from the active ``glassdoor`` ``APIConfiguration``
+(``api_key`` is the partner key, ``api_secret`` the partner id).
+"""
+import logging
+import time
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.core.lazy import lazy_import
+from apps.integrations.models import APIConfiguration
+from apps.jobs.models import Company
+
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_URL = 'https://api.glassdoor.com/api/api.htm'
+
+
+class GlassdoorClient:
+    """Rate-limited client for the Glassdoor employer search"""
+
+    def __init__(self, configuration: APIConfiguration, requests_per_minute: int):
+        self.configuration = configuration
+        self.interval = 60 / requests_per_minute
+        self.session = requests.Session()
+        self._last_request = 0.0
+
+    @classmethod
+    def from_settings(cls) -> Optional['GlassdoorClient']:
+        configuration = APIConfiguration.objects.filter(service_type='glassdoor', is_active=True).first()
+        if configuration is None:
+            return None
+        return cls(configuration, settings.GLASSDOOR_REQUESTS_PER_MINUTE)
+
+    def _throttle(self) -> None:
+        wait = self._last_request + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def employer(self, name: str) -> Optional[dict]:
+        """Best matching employer for ``name``, or ``None``"""
+        self._throttle()
+        response = self.session.get(
+            self.configuration.base_url or DEFAULT_URL,
+            params={
+                'v': '1', 'format': 'json', 'action': 'employers', 'q': name, 'ps': '1',
+                't.p': self.configuration.api_secret, 't.k': self.configuration.api_key,
+            },
+            headers={'User-Agent': 'job-tracker'},
+            timeout=settings.SCRAPE_REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        employers = response.json().get('response', {}).get('employers', [])
+        return employers[0] if employers else None
+
+
+def refresh_companies(companies: Iterable[Company], client: GlassdoorClient) -> int:
+    """Fetch ratings for ``companies`` and store them in one update; returns how many were found"""
+    found, fetched = 0, []
+    for company in companies:
+        try:
+            employer = client.employer(company.name)
+        except requests.RequestException as exc:
+            logger.warning("Glassdoor lookup for %s failed: %s", company.name, exc)
+            continue
+        if employer:
+            company.glassdoor_id = str(employer.get('id', ''))[:50]
+            company.rating = float(employer['overallRating']) if employer.get('overallRating') else None
+            company.size = str(employer.get('size') or '')[:50]
+            found += 1
+        # Misses are cached too, so unknown employers are retried only after the TTL.
+        company.rating_fetched_at = timezone.now()
+        fetched.append(company)
+    Company.objects.bulk_update(fetched, ['glassdoor_id', 'rating', 'size', 'rating_fetched_at'])
+    return found
@@ -0,0 +1,63 @@
+"""
+Google Workspace API providers.
+
+``googleapiclient`` and its discovery documents are loaded on first use.
+Built services are cached per thread, because the ``httplib2`` connection
+inside a service is not thread-safe, and keyed on the integration and API
+version. A cached service is rebuilt when the integration's stored tokens
+change, and each thread keeps at most ``GOOGLE_SERVICE_CACHE_SIZE``.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from apps.integrations.models import GoogleIntegration
+
+logger = logging.getLogger(__name__)
+
+TOKEN_URI = 'https://oauth2.googleapis.com/token'
+
+API_VERSIONS = {
+    'sheets': ('sheets', 'v4'),
+    'docs': ('docs', 'v1'),
+    'gmail': ('gmail', 'v1'),
+}
+
+_local = threading.local()
+
+
+def _build(access_token: str, refresh_token: str, api: str, version: str):
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build
+
+    credentials = Credentials(
+        token=access_token,
+        refresh_token=refresh_token,
+        token_uri=TOKEN_URI,
+        client_id=settings.GOOGLE_CLIENT_ID,
+        client_secret=settings.GOOGLE_CLIENT_SECRET,
+    )
+    return build(api, version, credentials=credentials, cache_discovery=False)
+
+
+def _services() -> OrderedDict:
+    if not hasattr(_local, 'services'):
+        _local.services = OrderedDict()
+    return _local.services
+
+
+def get_service(integration: GoogleIntegration):
+    """Google API service for ``integration``, built on first use in this thread"""
+    api, version = API_VERSIONS[integration.integration_type]
+    key = (integration.pk, api, version)
+    tokens = (integration.access_token, integration.refresh_token)
+    services = _services()
+    cached = services.pop(key, None)
+    if cached is None or cached[0] != tokens:
+        cached = (tokens, _build(*tokens, api, version))
+    services[key] = cached
+    while len(services) > settings.GOOGLE_SERVICE_CACHE_SIZE:
+        services.popitem(last=False)
+    return cached[1]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from apps.core.querysets import TimeRangeQuerySet
 from apps.jobs.models import Application
 
 
@@ -9,6 +10,7 @@ class EmailAccount(models.Model):
     imap_server = models.CharField(max_length=100)
     smtp_server = models.CharField(max_length=100)
     password = models.CharField(max_length=255)  # Encrypted
+    last_synced_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -58,6 +60,9 @@ class Email(models.Model):
     sent_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    partition_field = 'sent_at'
+    objects = TimeRangeQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Email")
         verbose_name_plural = _("Emails")
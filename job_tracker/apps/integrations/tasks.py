@@ -0,0 +1,53 @@
+import imaplib
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.core.scheduling import singleton
+from apps.integrations import email_sync, glassdoor
+from apps.integrations.models import EmailAccount
+from apps.jobs.models import Company
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def sync_emails_task():
+    """Fan out one sync per active email account"""
+    for account_id in EmailAccount.objects.filter(is_active=True).values_list('pk', flat=True):
+        sync_email_account_task.delay(account_id)
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def sync_email_account_task(self, account_id):
+    """Sync one account unless a sync for it is already in flight"""
+    with singleton(f'email-sync:{account_id}', timeout=settings.EMAIL_SYNC_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Email sync for account %s already in flight, skipping", account_id)
+            return 0
+
+        account = EmailAccount.objects.get(pk=account_id)
+        try:
+            return len(email_sync.sync_account(account))
+        except (imaplib.IMAP4.error, OSError) as exc:
+            raise self.retry(exc=exc, countdown=60 * 2 ** self.request.retries)
+
+
+@shared_task
+def refresh_company_ratings_task():
+    """Refresh Glassdoor data for companies never fetched or older than the TTL"""
+    client = glassdoor.GlassdoorClient.from_settings()
+    if client is None:
+        return 0
+    with singleton('glassdoor-refresh', timeout=settings.GLASSDOOR_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            return 0
+        stale_before = timezone.now() - timedelta(days=settings.COMPANY_RATING_TTL_DAYS)
+        companies = Company.objects.filter(
+            Q(rating_fetched_at__isnull=True) | Q(rating_fetched_at__lt=stale_before),
+        ).order_by(F('rating_fetched_at').asc(nulls_first=True))[:settings.GLASSDOOR_BATCH_SIZE]
+        return glassdoor.refresh_companies(companies, client)
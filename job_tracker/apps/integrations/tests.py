@@ -1,3 +1,112 @@
-from django.test import TestCase
+import threading
+from email.message import EmailMessage
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.integrations import email_sync, google
+from apps.integrations.factories import EmailFactory
+from apps.integrations.models import Email, EmailAccount, GoogleIntegration
+
+
+def _message(message_id: str, reply_to: str, sender: str) -> EmailMessage:
+    message = EmailMessage()
+    message['Message-ID'] = message_id
+    message['In-Reply-To'] = reply_to
+    message['From'] = sender
+    message['To'] = 'Recruiter@Example.COM'
+    message['Subject'] = 'Re: Backend Developer'
+    message['Date'] = 'Mon, 03 Jun 2024 10:00:00 +0000'
+    message.set_content('Thanks for applying.')
+    return message
+
+
+@mock.patch('apps.integrations.email_sync.events.publish')
+class SyncAccountTests(TestCase):
+    def setUp(self):
+        self.account = EmailAccount.objects.create(
+            email='me@example.com', imap_server='imap.example.com', smtp_server='smtp.example.com', password='x',
+        )
+        self.original = EmailFactory(message_id='<original@example.com>')
+
+    def sync(self, messages):
+        with mock.patch.object(email_sync, '_fetch_messages', return_value=messages):
+            return email_sync.sync_account(self.account)
+
+    def test_counts_only_new_messages(self, publish):
+        existing = EmailFactory(thread=self.original.thread, message_id='<known@example.com>')
+        created = self.sync([
+            _message(existing.message_id, self.original.message_id, 'recruiter@example.com'),
+            _message('<reply@example.com>', self.original.message_id, 'recruiter@example.com'),
+            _message('<reply@example.com>', self.original.message_id, 'recruiter@example.com'),
+        ])
+        self.assertEqual([stored.message_id for stored in created], ['<reply@example.com>'])
+        self.assertEqual(publish.call_args.args[1]['count'], 1)
+        self.assertEqual(Email.objects.filter(message_id='<reply@example.com>').count(), 1)
+
+    def test_reserved_message_id_is_skipped(self, publish):
+        # The partition guard still holds the key of an archived email.
+        save = Email.save
+
+        def guarded_save(email, *args, **kwargs):
+            if email.message_id == '<archived@example.com>':
+                raise IntegrityError('duplicate key value violates unique constraint')
+            return save(email, *args, **kwargs)
+        with mock.patch.object(Email.objects, 'bulk_create', side_effect=IntegrityError), \
+                mock.patch.object(Email, 'save', guarded_save), \
+                self.assertLogs('apps.integrations.email_sync', 'WARNING'):
+            created = self.sync([
+                _message('<archived@example.com>', self.original.message_id, 'recruiter@example.com'),
+                _message('<reply@example.com>', self.original.message_id, 'recruiter@example.com'),
+            ])
+        self.assertEqual([stored.message_id for stored in created], ['<reply@example.com>'])
+        self.account.refresh_from_db()
+        self.assertIsNotNone(self.account.last_synced_at)
+
+    def test_matches_addresses_case_insensitively(self, publish):
+        created = self.sync([_message('<mine@example.com>', self.original.message_id, 'Me <ME@Example.com>')])
+        self.assertEqual(created[0].email_type, 'outbound_manual')
+        self.assertEqual(created[0].sender, 'me@example.com')
+        self.assertEqual(created[0].recipients, ['recruiter@example.com'])
+
+    def test_ignores_messages_outside_tracked_threads(self, publish):
+        self.assertEqual(self.sync([_message('<other@example.com>', '<unknown@example.com>', 'a@example.com')]), [])
+        publish.assert_not_called()
+
+    @override_settings(EMAIL_SYNC_IMAP_TIMEOUT=7)
+    def test_imap_connection_has_timeout(self, publish):
+        with mock.patch('imaplib.IMAP4_SSL') as imap:
+            imap.return_value.__enter__.return_value.search.return_value = ('OK', [b''])
+            email_sync.sync_account(self.account)
+        imap.assert_called_once_with('imap.example.com', timeout=7)
+
+
+@override_settings(GOOGLE_SERVICE_CACHE_SIZE=2)
+@mock.patch('apps.integrations.google._build', side_effect=lambda *args: object())
+class GoogleServiceCacheTests(SimpleTestCase):
+    def setUp(self):
+        google._local.__dict__.pop('services', None)
+        self.integration = GoogleIntegration(pk=1, integration_type='sheets', access_token='a', refresh_token='r')
+
+    def test_reuses_service_until_tokens_change(self, build):
+        service = google.get_service(self.integration)
+        self.assertIs(google.get_service(self.integration), service)
+        self.integration.access_token = 'b'
+        self.assertIsNot(google.get_service(self.integration), service)
+        self.assertEqual(build.call_count, 2)
+
+    def test_threads_do_not_share_services(self, build):
+        services = [google.get_service(self.integration)]
+        thread = threading.Thread(target=lambda: services.append(google.get_service(self.integration)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(services[0], services[1])
+
+    def test_evicts_least_recently_used(self, build):
+        first = google.get_service(self.integration)
+        google.get_service(GoogleIntegration(pk=2, integration_type='docs'))
+        google.get_service(self.integration)
+        google.get_service(GoogleIntegration(pk=3, integration_type='gmail'))
+        self.assertEqual(list(google._services()), [(1, 'sheets', 'v4'), (3, 'gmail', 'v1')])
+        self.assertIs(google.get_service(self.integration), first)
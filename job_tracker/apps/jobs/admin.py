@@ -1,14 +1,35 @@
 from django.contrib import admin
-from .models import Job, Application, JobSearchCriteria
+from .models import Company, Job, Application, ApplicationStatusChange, JobSearchCriteria
+
+
+@admin.register(Company)
+class CompanyAdmin(admin.ModelAdmin):
+    list_display = ['name', 'canonical_name', 'rating', 'size', 'rating_fetched_at']
+    list_filter = ['size', 'rating_fetched_at']
+    search_fields = ['name', 'canonical_name']
+    readonly_fields = ['canonical_name', 'created_at']
 
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
     list_display = ['title', 'company', 'location', 'platform', 'posted_date', 'detected_language']
-    list_filter = ['platform', 'posted_date', 'detected_language', 'company_rating']
+    list_filter = ['platform', 'posted_date', 'detected_language', 'company_profile__size']
     search_fields = ['title', 'company', 'description']
     readonly_fields = ['scraped_date']
     date_hierarchy = 'posted_date'
+    list_select_related = ['platform']
+    raw_id_fields = ['company_profile']
+
+
+class ApplicationStatusChangeInline(admin.TabularInline):
+    model = ApplicationStatusChange
+    fields = ['from_status', 'to_status', 'changed_at', 'time_in_previous']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Application)
@@ -16,8 +37,10 @@ class ApplicationAdmin(admin.ModelAdmin):
     list_display = ['job', 'status', 'applied_date', 'target_language', 'created_at']
     list_filter = ['status', 'target_language', 'created_at', 'applied_date']
     search_fields = ['job__title', 'job__company', 'notes']
+    list_select_related = ['job']
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'created_at'
+    inlines = [ApplicationStatusChangeInline]
 
 
 @admin.register(JobSearchCriteria)
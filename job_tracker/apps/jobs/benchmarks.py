@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import factory
+from django.db.models import Q
+
+from apps.core.benchmarking import benchmark
+from apps.core.factories import PLATFORMS, JobPlatformFactory
+from apps.jobs import companies, extractors, ranking
+from apps.jobs.factories import CompanyFactory, JobFactory
+from apps.jobs.models import Job
+
+INGEST_BATCH = 1000
+EXTRACT_COPIES = 50
+PAGES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'pages'
+
+
+@benchmark('ingest_throughput', repeat=3)
+def ingest_throughput() -> int:
+    """Build and bulk insert a batch of scraped postings"""
+    platforms = [JobPlatformFactory(name=name) for name in PLATFORMS]
+    jobs = JobFactory.build_batch(INGEST_BATCH, platform=factory.Iterator(platforms))
+    Job.objects.bulk_create(jobs)
+    return len(jobs)
+
+
+@benchmark('job_search')
+def job_search() -> int:
+    """First result page of a keyword search in English and German"""
+    found = 0
+    for keyword in ('Python', 'Entwickler', 'Berlin'):
+        page = Job.objects.filter(
+            Q(title__icontains=keyword) | Q(description__icontains=keyword) | Q(location__icontains=keyword)
+        ).select_related('platform')[:20]
+        found += len(page)
+    return found
+
+
+@benchmark('job_ranking')
+def job_ranking() -> int:
+    """Top 20 jobs for a CV from the memory-mapped index"""
+    cv = 'Senior Python Entwickler mit Django, PostgreSQL, Celery, Redis, Docker und AWS Erfahrung'
+    return len(ranking.get_index().search(cv, k=20))
+
+
+def _fixture_pages(copies: int) -> list[tuple[str, bytes, str]]:
+    pages = []
+    for path in sorted(PAGES_DIR.glob('*.html')):
+        content = path.read_bytes()
+        pages.extend([(path.stem, content, f'https://{path.stem}.example/search')] * copies)
+    return pages
+
+
+@benchmark('extract_pages_inline')
+def extract_pages_inline() -> int:
+    """Extract postings from saved board pages in this process"""
+    return sum(len(extractors.extract(*page)) for page in _fixture_pages(EXTRACT_COPIES))
+
+
+@benchmark('extract_pages_pool')
+def extract_pages_pool() -> int:
+    """Extract postings from saved board pages in the parser process pool"""
+    return sum(len(records) for records in extractors.parse_pages(_fixture_pages(EXTRACT_COPIES)))
+
+
+@benchmark('company_resolve')
+def company_resolve() -> int:
+    """Resolve a batch of posted company names, spelling variants included, to companies"""
+    known = CompanyFactory.create_batch(200)
+    names = [company.name for company in known]
+    names += [name.replace('GmbH', 'GmbH & Co. KG').upper() for name in names[:100]]
+    names += [f'{name} Neu' for name in names[:100]]
+    return len(companies.resolve(names))
@@ -0,0 +1,168 @@
+"""
+Bounded pool of long-lived headless Chrome sessions.
+
+Launching a browser costs seconds and hundreds of MB, so each worker process
+keeps at most ``SCRAPE_BROWSER_POOL_SIZE`` sessions and hands them out one
+page at a time. A session is recycled after ``SCRAPE_BROWSER_MAX_PAGES``
+pages, when its process tree grows beyond ``SCRAPE_BROWSER_MAX_RSS_MB`` or
+when the driver raises, which keeps slow leaks in the browser from building
+up over a long-running worker.
+
+The pool is per process, so a host runs up to ``scrape`` worker concurrency
+x ``SCRAPE_BROWSER_POOL_SIZE`` browsers, each a few hundred MB. A prefork
+child runs one task at a time and a scrape fetches its pages one after the
+other, so the default of one session per process is enough there; a larger
+pool only pays off with a threaded worker (``--pool threads``). Size the
+worker concurrency to the memory the browsers may take. Prefork children
+exit without running ``atexit`` handlers, so ``close_pool`` is also hooked
+to Celery's ``worker_process_shutdown``.
+"""
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+from apps.core.lazy import lazy_import
+
+webdriver = lazy_import('selenium.webdriver')
+selenium_exceptions = lazy_import('selenium.common.exceptions')
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(Exception):
+    """No browser session became free within the timeout"""
+
+
+@dataclass
+class BrowserSession:
+    driver: object
+    pages: int = 0
+
+
+def _children(pid: int) -> list[int]:
+    children = []
+    for task in Path(f'/proc/{pid}/task').glob('*'):
+        try:
+            children.extend(int(child) for child in (task / 'children').read_text().split())
+        except OSError:
+            continue
+    return children
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """Resident memory of ``pid`` and its descendants; 0 where /proc is unavailable"""
+    total_kb, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            status = Path(f'/proc/{current}/status').read_text()
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith('VmRSS:'):
+                total_kb += int(line.split()[1])
+                break
+        pending.extend(_children(current))
+    return total_kb / 1024
+
+
+class BrowserPool:
+    """Hands out headless browser sessions, at most ``size`` at a time"""
+
+    def __init__(self, size: int, max_pages: int, max_rss_mb: int):
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: list[BrowserSession] = []
+        self._idle_lock = threading.Lock()
+
+    def _launch(self) -> BrowserSession:
+        options = webdriver.ChromeOptions()
+        for argument in ('--headless=new', '--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage',
+                         '--blink-settings=imagesEnabled=false', '--window-size=1280,2000'):
+            options.add_argument(argument)
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(settings.SCRAPE_REQUEST_TIMEOUT)
+        logger.info("Launched headless browser (pid %s)", driver.service.process.pid)
+        return BrowserSession(driver=driver)
+
+    def _should_recycle(self, session: BrowserSession) -> bool:
+        if session.pages >= self.max_pages:
+            return True
+        return process_tree_rss_mb(session.driver.service.process.pid) > self.max_rss_mb
+
+    @staticmethod
+    def _quit(session: BrowserSession) -> None:
+        try:
+            session.driver.quit()
+        except Exception:
+            logger.exception("Failed to quit browser session")
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[object]:
+        """Borrow a WebDriver for one page; blocks while all sessions are busy"""
+        if not self._slots.acquire(timeout=timeout or settings.SCRAPE_BROWSER_WAIT):
+            raise PoolExhausted("All browser sessions are busy")
+        try:
+            with self._idle_lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                session = self._launch()
+            broken = False
+            try:
+                yield session.driver
+            except selenium_exceptions.TimeoutException:
+                raise
+            except selenium_exceptions.WebDriverException:
+                broken = True
+                raise
+            finally:
+                self._release(session, broken)
+        finally:
+            self._slots.release()
+
+    def _release(self, session: BrowserSession, broken: bool) -> None:
+        session.pages += 1
+        if broken or self._should_recycle(session):
+            logger.info("Recycling browser after %d pages", session.pages)
+            self._quit(session)
+        else:
+            with self._idle_lock:
+                self._idle.append(session)
+
+    def close(self) -> None:
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._quit(session)
+
+
+_pool: Optional[BrowserPool] = None
+_pool_pid: Optional[int] = None
+
+
+def get_pool() -> BrowserPool:
+    """This process's browser pool; a forked worker never reuses its parent's"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = BrowserPool(
+            size=settings.SCRAPE_BROWSER_POOL_SIZE,
+            max_pages=settings.SCRAPE_BROWSER_MAX_PAGES,
+            max_rss_mb=settings.SCRAPE_BROWSER_MAX_RSS_MB,
+        )
+        _pool_pid = os.getpid()
+        atexit.register(_pool.close)
+    return _pool
+
+
+def close_pool(**kwargs) -> None:
+    """Quit this process's idle browsers"""
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close()
@@ -0,0 +1,124 @@
+"""
+Map company names as posted onto shared ``Company`` rows.
+
+Names are canonicalised by transliterating umlauts, dropping punctuation and
+connectives and normalising trailing legal forms, so "Müller & Söhne GmbH"
+and "Mueller und Soehne GmbH" resolve to the same company. Names that still
+differ are matched with ``difflib`` against existing companies, and names
+earlier in the batch, that start with the same ``PREFIX_LENGTH`` characters, above
+``COMPANY_MATCH_CUTOFF``. The legal form is kept out of the fuzzy comparison
+but must agree: "X GmbH" and "X AG" are different companies, while a name
+without a legal form matches either. ``resolve`` handles a whole batch of
+postings with a fixed number of queries.
+"""
+import difflib
+import re
+import unicodedata
+from functools import reduce
+from operator import or_
+from typing import Iterable
+
+from django.conf import settings
+from django.db.models import Q
+
+from apps.jobs.models import Company
+
+LEGAL_FORMS = {
+    'ag', 'bv', 'co', 'corp', 'corporation', 'ev', 'gbr', 'gmbh', 'haftungsbeschraenkt', 'inc', 'kg',
+    'kgaa', 'limited', 'llc', 'ltd', 'mbh', 'nv', 'ohg', 'plc', 'sa', 'sarl', 'se', 'ug',
+}
+TRANSLITERATIONS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+CONNECTIVES = {'&', 'and', 'und'}
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s&]')
+PREFIX_LENGTH = 4
+
+
+def _tokens(name: str) -> list[str]:
+    name = name.casefold().translate(TRANSLITERATIONS).replace('.', '')
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return [token for token in _PUNCTUATION_RE.sub(' ', name).replace('&', ' & ').split() if token not in CONNECTIVES]
+
+
+def _split(tokens: list[str]) -> tuple[list[str], list[str]]:
+    end = len(tokens)
+    while end > 1 and tokens[end - 1] in LEGAL_FORMS:
+        end -= 1
+    return tokens[:end], tokens[end:]
+
+
+def canonical_name(name: str) -> str:
+    """Lower-case ASCII name without punctuation or connectives, ending in its legal form if any"""
+    return ' '.join(_tokens(name))[:100]
+
+
+def split_legal_form(canonical: str) -> tuple[str, str]:
+    """``(base name, legal form)`` of a canonical name; the form is empty when there is none"""
+    base, form = _split(canonical.split())
+    return ' '.join(base), ' '.join(form)
+
+
+def _closest(canonical: str, candidates: list[str]) -> str:
+    """Candidate with the most similar base name and a compatible legal form, or ''"""
+    base, form = split_legal_form(canonical)
+    by_base: dict[str, str] = {}
+    for candidate in candidates:
+        candidate_base, candidate_form = split_legal_form(candidate)
+        if not form or not candidate_form or form == candidate_form:
+            by_base.setdefault(candidate_base, candidate)
+    matches = difflib.get_close_matches(base, by_base, n=1, cutoff=settings.COMPANY_MATCH_CUTOFF)
+    return by_base[matches[0]] if matches else ''
+
+
+def resolve(names: Iterable[str]) -> dict[str, Company]:
+    """Return a ``Company`` for every distinct non-empty name, creating missing ones"""
+    by_canonical: dict[str, str] = {}
+    canonical_of: dict[str, str] = {}
+    for name in dict.fromkeys(names):
+        canonical = canonical_name(name) if name else ''
+        if canonical:
+            canonical_of[name] = canonical
+            by_canonical.setdefault(canonical, name)
+    if not by_canonical:
+        return {}
+
+    companies = {company.canonical_name: company for company in Company.objects.filter(
+        canonical_name__in=list(by_canonical),
+    )}
+    unmatched = [canonical for canonical in by_canonical if canonical not in companies]
+    aliases: dict[str, str] = {}
+    if unmatched:
+        # Only names are fetched for the fuzzy pass, bucketed by prefix so
+        # each name is compared with its own bucket rather than every row.
+        buckets: dict[str, list[str]] = {canonical[:PREFIX_LENGTH]: [] for canonical in unmatched}
+        for candidate in Company.objects.filter(
+            reduce(or_, (Q(canonical_name__startswith=prefix) for prefix in buckets)),
+        ).values_list('canonical_name', flat=True):
+            # Names shorter than PREFIX_LENGTH are their own, shorter prefix.
+            for length in range(1, PREFIX_LENGTH + 1):
+                if candidate[:length] in buckets:
+                    buckets[candidate[:length]].append(candidate)
+        for canonical in unmatched:
+            bucket = buckets[canonical[:PREFIX_LENGTH]]
+            match = _closest(canonical, bucket)
+            if match:
+                aliases[canonical] = match
+            else:
+                bucket.append(canonical)  # Later names in the batch may match this new company
+        existing = set(aliases.values()).difference(unmatched)
+        if existing:
+            companies.update({company.canonical_name: company for company in Company.objects.filter(
+                canonical_name__in=existing,
+            )})
+
+    missing = [canonical for canonical in unmatched if canonical not in aliases]
+    if missing:
+        Company.objects.bulk_create(
+            [Company(name=by_canonical[canonical][:100], canonical_name=canonical) for canonical in missing],
+            ignore_conflicts=True,
+        )
+        companies.update({company.canonical_name: company for company in Company.objects.filter(
+            canonical_name__in=missing,
+        )})
+
+    return {name: companies[aliases.get(canonical, canonical)] for name, canonical in canonical_of.items()}
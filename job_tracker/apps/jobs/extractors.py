@@ -0,0 +1,204 @@
+"""
+Declarative per-board extractors executed in a process pool.
+
+Each ``ExtractorSpec`` names an XPath that selects one node per posting and
+one XPath per ``Job`` field, evaluated relative to that node. Expressions are
+compiled once per process into ``lxml.etree.XPath`` objects. Parsing is
+CPU-bound, so ``parse_pages`` ships raw page bytes to a pool of
+``SCRAPE_PARSE_WORKERS`` processes and gets back compact tuples in
+``FIELDS`` order, which keeps fetching threads free and lets parsing scale
+with cores.
+
+Daemonic processes cannot start children: a Celery prefork child, or a
+``multiprocessing`` daemon, parses in-process instead and gets its
+parallelism from the worker's concurrency. The pool is used by threaded
+workers and management commands.
+"""
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urljoin
+
+from django.conf import settings
+
+from apps.core.lazy import lazy_import
+
+etree = lazy_import('lxml.etree')
+lxml_html = lazy_import('lxml.html')
+
+logger = logging.getLogger(__name__)
+
+FIELDS = (
+    'url', 'external_id', 'title', 'company', 'location', 'salary_range',
+    'description', 'requirements', 'posted_date',
+)
+
+Record = tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ExtractorSpec:
+    """XPath expressions locating postings and their fields on a result page"""
+    listing: str
+    fields: dict[str, str]
+
+
+SPECS = {
+    'stepstone': ExtractorSpec(
+        listing='//article[@data-at="job-item"]',
+        fields={
+            'url': 'string(.//a[@data-at="job-item-title"]/@href)',
+            'external_id': 'substring-after(@id, "job-item-")',
+            'title': 'normalize-space(.//a[@data-at="job-item-title"])',
+            'company': 'normalize-space(.//*[@data-at="job-item-company-name"])',
+            'location': 'normalize-space(.//*[@data-at="job-item-location"])',
+            'salary_range': 'normalize-space(.//*[@data-at="job-item-salary-info"])',
+            'description': 'normalize-space(.//*[@data-at="jobcard-content"])',
+            'requirements': './/*[@data-at="job-item-skills"]/li/text()',
+            'posted_date': 'string(.//time/@datetime)',
+        },
+    ),
+    'indeed': ExtractorSpec(
+        listing='//div[contains(concat(" ", normalize-space(@class), " "), " job_seen_beacon ")]',
+        fields={
+            'url': 'string(.//h2[contains(@class, "jobTitle")]//a/@href)',
+            'external_id': 'string(.//h2[contains(@class, "jobTitle")]//a/@data-jk)',
+            'title': 'normalize-space(.//h2[contains(@class, "jobTitle")]//a)',
+            'company': 'normalize-space(.//*[@data-testid="company-name"])',
+            'location': 'normalize-space(.//*[@data-testid="text-location"])',
+            'salary_range': 'normalize-space(.//*[contains(@class, "salary-snippet-container")])',
+            'description': 'normalize-space(.//*[contains(@class, "job-snippet")]//li[1])',
+            'requirements': './/*[contains(@class, "job-snippet")]//li[position() > 1]/text()',
+            'posted_date': 'string(.//*[contains(@class, "date")]/@data-posted)',
+        },
+    ),
+    'xing': ExtractorSpec(
+        listing='//article[@data-testid="job-search-result"]',
+        fields={
+            'url': 'string(.//a[@data-testid="job-teaser-title"]/@href)',
+            'external_id': 'string(@data-job-id)',
+            'title': 'normalize-space(.//a[@data-testid="job-teaser-title"])',
+            'company': 'normalize-space(.//*[@data-testid="job-teaser-company"])',
+            'location': 'normalize-space(.//*[@data-testid="job-teaser-location"])',
+            'salary_range': 'normalize-space(.//*[@data-testid="job-teaser-salary"])',
+            'description': 'normalize-space(.//*[@data-testid="job-teaser-description"])',
+            'requirements': '""',
+            'posted_date': 'string(.//time/@datetime)',
+        },
+    ),
+    'linkedin': ExtractorSpec(
+        listing='//div[contains(concat(" ", normalize-space(@class), " "), " base-search-card ")]',
+        fields={
+            'url': 'string(.//a[contains(@class, "base-card__full-link")]/@href)',
+            'external_id': 'substring-after(@data-entity-urn, "urn:li:jobPosting:")',
+            'title': 'normalize-space(.//*[contains(@class, "base-search-card__title")])',
+            'company': 'normalize-space(.//*[contains(@class, "base-search-card__subtitle")])',
+            'location': 'normalize-space(.//*[contains(@class, "job-search-card__location")])',
+            'salary_range': 'normalize-space(.//*[contains(@class, "job-search-card__salary-info")])',
+            'description': 'normalize-space(.//*[contains(@class, "job-search-card__snippet")])',
+            'requirements': '""',
+            'posted_date': 'string(.//time/@datetime)',
+        },
+    ),
+}
+
+_compiled: dict[str, tuple] = {}
+
+
+def compiled(platform_name: str) -> tuple:
+    """``(listing, [field XPath in FIELDS order])`` compiled once per process"""
+    if platform_name not in _compiled:
+        spec = SPECS[platform_name]
+        _compiled[platform_name] = (
+            etree.XPath(spec.listing),
+            [etree.XPath(spec.fields[name]) for name in FIELDS],
+        )
+    return _compiled[platform_name]
+
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        return ', '.join(part.strip() for part in value if part.strip())
+    return str(value).strip()
+
+
+def extract(platform_name: str, content: bytes, page_url: str) -> list[Record]:
+    """Extract one record per posting from a result page"""
+    if not content:
+        return []
+    listing, field_paths = compiled(platform_name)
+    document = lxml_html.document_fromstring(content)
+    records = []
+    for node in listing(document):
+        values = [_text(path(node)) for path in field_paths]
+        if not values[0]:
+            continue
+        values[0] = urljoin(page_url, values[0])
+        records.append(tuple(values))
+    return records
+
+
+def _extract_job(job: tuple[str, bytes, str]) -> list[Record]:
+    return extract(*job)
+
+
+def _warm_worker() -> None:
+    for platform_name in SPECS:
+        compiled(platform_name)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+
+
+def _is_daemon() -> bool:
+    if multiprocessing.current_process().daemon:
+        return True
+    # Celery's prefork children are billiard processes, invisible to multiprocessing.
+    billiard_process = sys.modules.get('billiard.process')
+    return bool(billiard_process and billiard_process.current_process().daemon)
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """This process's parser pool, or ``None`` when parsing runs in-process"""
+    global _pool, _pool_pid
+    if settings.SCRAPE_PARSE_WORKERS < 1:
+        return None
+    if _pool_pid != os.getpid():
+        _pool_pid = os.getpid()
+        _pool = None
+        if _is_daemon():
+            logger.info("Daemonic process, parsing pages in-process")
+        else:
+            _pool = ProcessPoolExecutor(max_workers=settings.SCRAPE_PARSE_WORKERS, initializer=_warm_worker)
+    return _pool
+
+
+def parse_pages(pages: list[tuple[str, bytes, str]]) -> list[list[Record]]:
+    """Extract records from ``(platform, content, url)`` pages, in order"""
+    global _pool
+    pool = get_pool()
+    if pool is not None and len(pages) > 1:
+        try:
+            chunksize = max(1, len(pages) // (settings.SCRAPE_PARSE_WORKERS * 4))
+            return list(pool.map(_extract_job, pages, chunksize=chunksize))
+        except BrokenProcessPool:
+            logger.warning("Parser pool died, restarting it and parsing in-process")
+            _pool = ProcessPoolExecutor(max_workers=settings.SCRAPE_PARSE_WORKERS, initializer=_warm_worker)
+        except (OSError, AssertionError) as exc:
+            # Workers start on the first map, so this is where a process that
+            # may not have children finds out; keep parsing in-process from now on.
+            logger.warning("Cannot start parser processes (%s), parsing in-process", exc)
+            pool.shutdown(wait=False)
+            _pool = None
+    return [_extract_job(page) for page in pages]
+
+
+def to_posting(record: Record) -> dict:
+    """Posting dictionary accepted by ``ingest_postings``"""
+    return dict(zip(FIELDS, record))
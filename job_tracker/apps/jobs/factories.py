@@ -0,0 +1,68 @@
+import random
+import uuid
+from datetime import timedelta
+
+import factory
+from django.utils import timezone
+from factory.django import DjangoModelFactory
+
+from apps.core.factories import LANGUAGES, JobPlatformFactory, faker_for, random_skills
+from apps.jobs.companies import canonical_name
+from apps.jobs.models import Application, Company, Job
+
+
+COMPANY_SIZES = ['1-50', '51-200', '201-500', '501-1000', '1001-5000', '5001-10000', '10000+']
+
+
+class CompanyFactory(DjangoModelFactory):
+    class Meta:
+        model = Company
+        django_get_or_create = ['canonical_name']
+
+    name = factory.LazyFunction(lambda: faker_for(random.choice(LANGUAGES)).company()[:100])
+    canonical_name = factory.LazyAttribute(lambda o: canonical_name(o.name))
+    rating = factory.LazyFunction(lambda: round(random.uniform(2.5, 4.8), 1))
+    size = factory.LazyFunction(lambda: random.choice(COMPANY_SIZES))
+    rating_fetched_at = factory.LazyFunction(lambda: timezone.now() - timedelta(days=random.randrange(60)))
+
+
+class JobFactory(DjangoModelFactory):
+    class Meta:
+        model = Job
+
+    detected_language = factory.LazyFunction(lambda: random.choice(LANGUAGES))
+    platform = factory.SubFactory(JobPlatformFactory)
+    title = factory.LazyAttribute(lambda o: faker_for(o.detected_language).job())
+    company = factory.LazyAttribute(lambda o: faker_for(o.detected_language).company()[:100])
+    location = factory.LazyAttribute(lambda o: faker_for(o.detected_language).city())
+    salary_min = factory.LazyFunction(lambda: random.randrange(35000, 90000, 1000))
+    salary_max = factory.LazyAttribute(lambda o: o.salary_min + random.randrange(5000, 30000, 1000))
+    salary_range = factory.LazyAttribute(lambda o: f'{o.salary_min:,} - {o.salary_max:,} EUR')
+    description = factory.LazyAttribute(
+        lambda o: faker_for(o.detected_language).paragraph(nb_sentences=12)
+    )
+    requirements = factory.LazyFunction(lambda: ', '.join(random_skills()))
+    url = factory.LazyAttribute(lambda o: f'https://{o.platform.name}.example/jobs/{uuid.uuid4().hex}')
+    external_id = factory.LazyFunction(lambda: uuid.uuid4().hex[:16])
+    posted_date = factory.LazyFunction(lambda: timezone.now() - timedelta(minutes=random.randrange(60 * 24 * 365)))
+
+
+class ApplicationFactory(DjangoModelFactory):
+    class Meta:
+        model = Application
+
+    job = factory.SubFactory(JobFactory)
+    status = factory.LazyFunction(lambda: random.choices(
+        [choice for choice, _ in Application.STATUS_CHOICES], weights=[30, 40, 10, 8, 10, 2],
+    )[0])
+    created_at = factory.LazyAttribute(
+        lambda o: min(timezone.now(), o.job.posted_date + timedelta(hours=random.randrange(1, 24)))
+    )
+    applied_date = factory.LazyAttribute(
+        lambda o: None if o.status == 'not_applied' else o.job.posted_date + timedelta(days=random.randrange(1, 14))
+    )
+    target_language = factory.SelfAttribute('job.detected_language')
+    cv_version = factory.LazyAttribute(lambda o: faker_for(o.target_language).text(max_nb_chars=1500))
+    cv_original_language = factory.SelfAttribute('target_language')
+    cover_letter = factory.LazyAttribute(lambda o: faker_for(o.target_language).text(max_nb_chars=1000))
+    cover_letter_original_language = factory.SelfAttribute('target_language')
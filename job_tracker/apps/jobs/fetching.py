@@ -0,0 +1,163 @@
+"""
+Search page fetching with a plain HTTP fast path and browser fallback.
+
+Every board is first requested over a pooled ``requests`` session, one per
+thread. If the response already contains the server-rendered listing
+(checked with the board's listing expression from ``extractors.SPECS``), or
+the board's "no results" marker, it is used as is. Only pages that need JavaScript, and
+boards marked ``browser_only``, go through the shared headless browser
+pool, which waits for either of the two to render.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from apps.core.lazy import lazy_import
+from apps.core.models import JobPlatform
+from apps.jobs import extractors
+from apps.jobs.browser import get_pool
+from apps.jobs.models import JobSearchCriteria
+
+requests = lazy_import('requests')
+lxml_html = lazy_import('lxml.html')
+expected_conditions = lazy_import('selenium.webdriver.support.expected_conditions')
+selenium_by = lazy_import('selenium.webdriver.common.by')
+selenium_wait = lazy_import('selenium.webdriver.support.wait')
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/119.0 Safari/537.36'
+)
+
+
+@dataclass(frozen=True)
+class BoardPages:
+    """How to request a board's search result page and wait for it to render"""
+    wait_css: str
+    empty_xpath: str  # Rendered instead of the listing when nothing matches
+    query_params: dict = field(default_factory=lambda: {'keywords': 'q', 'location': 'l'})
+    page_param: str = 'page'
+    page_size: Optional[int] = None  # Boards paging by result offset rather than page number
+    browser_only: bool = False
+
+
+BOARDS = {
+    'stepstone': BoardPages(
+        wait_css='article[data-at="job-item"]',
+        empty_xpath='//*[@data-at="no-results" or @data-at="search-no-results"]',
+        query_params={'keywords': 'what', 'location': 'where'},
+    ),
+    'indeed': BoardPages(
+        wait_css='div.job_seen_beacon',
+        empty_xpath='//*[contains(@class, "jobsearch-NoResult")]',
+        page_param='start',
+        page_size=10,
+    ),
+    'xing': BoardPages(
+        wait_css='article[data-testid="job-search-result"]',
+        empty_xpath='//*[@data-testid="search-no-results"]',
+        query_params={'keywords': 'keywords', 'location': 'location'},
+    ),
+    'linkedin': BoardPages(
+        wait_css='div.base-search-card',
+        empty_xpath='//*[contains(@class, "no-results")]',
+        query_params={'keywords': 'keywords', 'location': 'location'},
+        page_param='start',
+        page_size=25,
+    ),
+}
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    content: bytes
+    via: str  # 'http' or 'browser'
+    elapsed: float
+    empty: bool = False  # The board reported no (more) results
+
+
+_local = threading.local()  # requests.Session is not thread-safe
+
+
+def _http_session():
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=settings.SCRAPE_HTTP_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'User-Agent': USER_AGENT, 'Accept-Language': 'de-DE,de;q=0.9,en;q=0.8'})
+    return session
+
+
+def search_url(criteria: JobSearchCriteria, platform: JobPlatform, page: int = 1) -> str:
+    """The board's search page for ``criteria``, rooted at the platform endpoint"""
+    board = BOARDS[platform.name]
+    names = board.query_params
+    params = {names['keywords']: criteria.keywords, names['location']: criteria.location}
+    if page > 1:
+        params[board.page_param] = (page - 1) * board.page_size if board.page_size else page
+    return f'{platform.api_endpoint}?{urlencode(params)}'
+
+
+def page_state(content: bytes, platform_name: str) -> Optional[str]:
+    """``'listing'`` or ``'empty'`` for a rendered result page, ``None`` when it is neither"""
+    if not content:
+        return None
+    document = lxml_html.fromstring(content)
+    listing, _ = extractors.compiled(platform_name)
+    if listing(document):
+        return 'listing'
+    if document.xpath(BOARDS[platform_name].empty_xpath):
+        return 'empty'
+    return None
+
+
+def has_listing(content: bytes, platform_name: str) -> bool:
+    return page_state(content, platform_name) == 'listing'
+
+
+def _fetch_http(url: str, platform_name: str) -> tuple[Optional[bytes], Optional[str]]:
+    try:
+        response = _http_session().get(url, timeout=settings.SCRAPE_REQUEST_TIMEOUT)
+    except requests.RequestException as exc:
+        logger.info("HTTP fetch of %s failed (%s), falling back to browser", url, exc)
+        return None, None
+    if response.status_code != 200:
+        return None, None
+    state = page_state(response.content, platform_name)
+    return (response.content, state) if state else (None, None)
+
+
+def _fetch_browser(url: str, board: BoardPages) -> bytes:
+    with get_pool().session() as driver:
+        driver.get(url)
+        selenium_wait.WebDriverWait(driver, settings.SCRAPE_REQUEST_TIMEOUT).until(expected_conditions.any_of(
+            expected_conditions.presence_of_element_located((selenium_by.By.CSS_SELECTOR, board.wait_css)),
+            expected_conditions.presence_of_element_located((selenium_by.By.XPATH, board.empty_xpath)),
+        ))
+        return driver.page_source.encode()
+
+
+def fetch_page(platform_name: str, url: str) -> FetchedPage:
+    """Fetch ``url`` over HTTP when possible, otherwise with a pooled browser"""
+    board = BOARDS[platform_name]
+    start = time.perf_counter()
+    if not board.browser_only:
+        content, state = _fetch_http(url, platform_name)
+        if content is not None:
+            return FetchedPage(url=url, content=content, via='http', elapsed=time.perf_counter() - start,
+                               empty=state == 'empty')
+
+    content = _fetch_browser(url, board)
+    logger.info("Fetched %s with the browser", url)
+    return FetchedPage(url=url, content=content, via='browser', elapsed=time.perf_counter() - start,
+                       empty=page_state(content, platform_name) == 'empty')
@@ -0,0 +1,55 @@
+"""Reconstruct status history for applications saved without the transition log"""
+from datetime import timedelta
+from typing import Iterable
+
+from django.utils import timezone
+
+from apps.jobs.models import Application, ApplicationStatusChange
+
+STATUS_PATHS = {
+    'not_applied': ['not_applied'],
+    'applied': ['not_applied', 'applied'],
+    'interview_scheduled': ['not_applied', 'applied', 'interview_scheduled'],
+    'interviewed': ['not_applied', 'applied', 'interview_scheduled', 'interviewed'],
+    'rejected': ['not_applied', 'applied', 'rejected'],
+    'accepted': ['not_applied', 'applied', 'interview_scheduled', 'interviewed', 'accepted'],
+}
+
+STEP = timedelta(days=7)
+
+
+def reconstruct(applications: Iterable[Application]) -> int:
+    """
+    Log the usual path to each application's current status.
+
+    Applications that already have a history are left alone. The
+    application enters ``applied`` at ``applied_date`` (or when it was
+    created), a day after it was first tracked, and every later stage follows
+    a week apart, capped at now.
+    """
+    applications = list(applications)
+    logged = set(
+        ApplicationStatusChange.objects.filter(application__in=applications)
+        .values_list('application_id', flat=True).distinct()
+    )
+    now = timezone.now()
+    changes = []
+    for application in applications:
+        if application.pk in logged:
+            continue
+        path = STATUS_PATHS[application.status]
+        applied_at = application.applied_date or application.created_at
+        tracked_at = application.created_at if len(path) == 1 else applied_at - timedelta(days=1)
+        previous = None
+        for step, status in enumerate(path):
+            changed_at = min(now, applied_at + STEP * (step - 1) if step else tracked_at)
+            changes.append(ApplicationStatusChange(
+                application=application,
+                from_status=path[step - 1] if step else '',
+                to_status=status,
+                changed_at=changed_at,
+                time_in_previous=changed_at - previous if previous else None,
+            ))
+            previous = changed_at
+    ApplicationStatusChange.objects.bulk_create(changes, batch_size=1000)
+    return len(changes)
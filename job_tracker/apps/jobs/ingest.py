@@ -0,0 +1,111 @@
+"""Turn platform postings into deduplicated ``Job`` rows"""
+import datetime
+import logging
+import re
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.core.models import JobPlatform
+from apps.jobs import companies
+from apps.jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+POSTING_FIELDS = [
+    'title', 'company', 'location', 'salary_range', 'salary_min', 'salary_max',
+    'description', 'requirements', 'external_id',
+]
+
+
+_AMOUNT_RE = re.compile(r'(\d{1,3}(?:[.,\s]\d{3})+|\d+(?:[.,]\d+)?)\s*([kK](?![^\W\d_]))?')
+_FRACTION_RE = re.compile(r'\d+[.,]\d{1,2}')
+_RANGE_GAP_RE = re.compile(r'\s*(?:-|–|bis|to)\s*[€$£]?\s*')
+
+
+def _amount(number: str, thousands: bool) -> Decimal:
+    if thousands:
+        return (Decimal(number.replace(',', '.')) * 1000).to_integral_value()
+    if _FRACTION_RE.fullmatch(number):
+        return Decimal(number.replace(',', '.')).to_integral_value()
+    return Decimal(re.sub(r'\D', '', number))
+
+
+def salary_bounds(text: str) -> tuple[Optional[Decimal], Optional[Decimal]]:
+    """Lower and upper amount of a board's salary text such as ``65.000 € - 80.000 €`` or ``€70K - €90K``"""
+    text = text or ''
+    matches = list(_AMOUNT_RE.finditer(text))
+    amounts = []
+    for position, match in enumerate(matches):
+        thousands = bool(match[2])
+        if not thousands and position + 1 < len(matches):
+            # In "70-90k" the suffix applies to both ends of the range.
+            following = matches[position + 1]
+            thousands = bool(following[2]) and bool(_RANGE_GAP_RE.fullmatch(text[match.end():following.start()]))
+        amounts.append(_amount(match[1], thousands))
+    amounts = [amount for amount in amounts if amount >= 1000]
+    if not amounts:
+        return None, None
+    return min(amounts), max(amounts)
+
+
+def _parse_posted_date(value) -> timezone.datetime:
+    posted = value
+    if isinstance(value, str):
+        posted = parse_datetime(value)
+        if posted is None and (day := parse_date(value)) is not None:
+            posted = datetime.datetime.combine(day, datetime.time())
+    if posted is None:
+        return timezone.now()
+    if timezone.is_naive(posted):
+        posted = timezone.make_aware(posted)
+    return posted
+
+
+def build_job(platform: JobPlatform, posting: dict) -> Job:
+    """Map one posting dictionary onto an unsaved ``Job``"""
+    values = {}
+    for name in POSTING_FIELDS:
+        value = posting.get(name)
+        field = Job._meta.get_field(name)
+        if value is None:
+            value = None if field.null else ''
+        elif field.max_length:
+            value = str(value)[:field.max_length]
+        values[name] = value
+    if values['salary_min'] is None and values['salary_max'] is None:
+        values['salary_min'], values['salary_max'] = salary_bounds(values['salary_range'])
+    return Job(
+        platform=platform,
+        url=posting['url'],
+        posted_date=_parse_posted_date(posting.get('posted_date')),
+        **values,
+    )
+
+
+def _new_jobs(platform: JobPlatform, postings: dict[str, dict]) -> list[Job]:
+    existing = set(Job.objects.filter(url__in=list(postings)).values_list('url', flat=True))
+    jobs = [build_job(platform, posting) for url, posting in postings.items() if url not in existing]
+    profiles = companies.resolve(job.company for job in jobs)
+    for job in jobs:
+        job.company_profile = profiles.get(job.company)
+    return jobs
+
+
+def ingest_postings(platform: JobPlatform, postings: Iterable[dict]) -> list[Job]:
+    """Store postings whose URL is not known yet and return the created jobs"""
+    by_url = {posting['url']: posting for posting in postings if posting.get('url')}
+    if not by_url:
+        return []
+
+    try:
+        with transaction.atomic():
+            return Job.objects.bulk_create(_new_jobs(platform, by_url))
+    except IntegrityError:
+        # A concurrent run for another search stored some of the same postings.
+        logger.info("Concurrent ingest on %s, retrying without duplicates", platform.name)
+        with transaction.atomic():
+            return Job.objects.bulk_create(_new_jobs(platform, by_url))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs import fetching
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch board pages through the HTTP fast path or the browser pool and report which was used. "
+        "Serve apps/jobs/fixtures/pages with 'python -m http.server' to try it locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('platform', choices=sorted(fetching.BOARDS))
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--repeat', type=int, default=1)
+
+    def handle(self, *args, **options):
+        for _ in range(options['repeat']):
+            for url in options['urls']:
+                page = fetching.fetch_page(options['platform'], url)
+                if not page.empty and not fetching.has_listing(page.content, options['platform']):
+                    raise CommandError(f"{url}: no job listing found")
+                state = 'empty' if page.empty else f"{len(page.content):>8} bytes"
+                self.stdout.write(f"{page.via:<8} {page.elapsed * 1000:>8.1f} ms  {state:>14}  {url}")
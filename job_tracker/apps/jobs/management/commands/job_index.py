@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs import ranking
+from apps.jobs.models import Application
+
+
+class Command(BaseCommand):
+    help = "Rebuild the job relevance index or rank jobs against a CV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'rank'])
+        parser.add_argument('--application', type=int, help="Rank against this application's CV")
+        parser.add_argument('-k', type=int, default=20, help="Number of jobs to return")
+
+    def handle(self, *args, **options):
+        if options['action'] == 'rebuild':
+            count = ranking.rebuild_index()
+            self.stdout.write(self.style.SUCCESS(f"Indexed {count} jobs"))
+            return
+
+        application = None
+        if options['application']:
+            try:
+                application = Application.objects.get(pk=options['application'])
+            except Application.DoesNotExist:
+                raise CommandError(f"Application {options['application']} does not exist")
+        text = ranking.cv_text(application)
+        if not text:
+            raise CommandError("No CV found: pass --application or add an active CV template")
+
+        for job, score in ranking.rank_jobs(text, k=options['k']):
+            self.stdout.write(f"{score:.3f}  {job.pk:>8}  {job}")
@@ -1,12 +1,40 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from apps.core.models import JobPlatform
+from apps.core.querysets import TimeRangeQuerySet
+from apps.jobs.signals import application_status_changed
+
+
+class Company(models.Model):
+    """Employer shared by all of its postings, with cached Glassdoor data"""
+    name = models.CharField(max_length=100)  # Name as first seen on a posting
+    canonical_name = models.CharField(max_length=100, unique=True)  # See apps.jobs.companies
+    glassdoor_id = models.CharField(max_length=50, blank=True)
+    rating = models.FloatField(null=True, blank=True)  # From Glassdoor
+    size = models.CharField(max_length=50, blank=True)
+    rating_fetched_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Company")
+        verbose_name_plural = _("Companies")
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['rating_fetched_at']),
+        ]
+
+    def __str__(self):
+        return self.name
 
 
 class Job(models.Model):
     """Job posting model"""
     title = models.CharField(max_length=200)
-    company = models.CharField(max_length=100)
+    company = models.CharField(max_length=100)  # Name as posted
+    company_profile = models.ForeignKey(
+        Company, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs',
+    )
     location = models.CharField(max_length=100)
     salary_range = models.CharField(max_length=50, blank=True)
     salary_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -18,12 +46,13 @@ class Job(models.Model):
     external_id = models.CharField(max_length=100)  # Platform-specific ID
     posted_date = models.DateTimeField()
     scraped_date = models.DateTimeField(auto_now_add=True)
-    company_rating = models.FloatField(null=True, blank=True)  # From Glassdoor
-    company_size = models.CharField(max_length=50, blank=True)
     detected_language = models.CharField(max_length=5, default='en')
     description_translated = models.TextField(blank=True)
     translation_language = models.CharField(max_length=5, blank=True)
 
+    partition_field = 'scraped_date'
+    objects = TimeRangeQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Job")
         verbose_name_plural = _("Jobs")
@@ -32,12 +61,45 @@ class Job(models.Model):
             models.Index(fields=['title', 'company']),
             models.Index(fields=['platform', 'posted_date']),
             models.Index(fields=['detected_language']),
+            models.Index(fields=['scraped_date']),
         ]
 
     def __str__(self):
         return f"{self.title} at {self.company}"
 
 
+class ApplicationQuerySet(models.QuerySet):
+    """
+    Applications whose status changes always reach the transition log.
+
+    ``update(status=...)`` and ``bulk_update`` of ``status`` would skip
+    ``Application.save`` and with it the log and funnel, so they are refused
+    in favour of ``set_status``. ``bulk_create`` cannot be guarded the same
+    way; bulk loaders call ``history.reconstruct`` and ``funnel.rebuild``
+    afterwards.
+    """
+
+    def set_status(self, status: str) -> int:
+        """Move every application to ``status``, logging each transition; returns how many changed"""
+        changed = 0
+        with transaction.atomic():
+            for application in self.select_for_update().exclude(status=status):
+                application.status = status
+                application.save(update_fields=['status', 'updated_at'])
+                changed += 1
+        return changed
+
+    def update(self, **kwargs):
+        if 'status' in kwargs:
+            raise ValueError("Use set_status() so status changes are logged")
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if 'status' in fields:
+            raise ValueError("Use set_status() so status changes are logged")
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+
 class Application(models.Model):
     """Job application tracking"""
     STATUS_CHOICES = [
@@ -69,6 +131,8 @@ class Application(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ApplicationQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Application")
         verbose_name_plural = _("Applications")
@@ -77,6 +141,78 @@ class Application(models.Model):
     def __str__(self):
         return f"Application for {self.job.title} at {self.job.company}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = values[field_names.index('status')]
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or 'status' in fields:
+            self._loaded_status = self.status
+
+    def save(self, *args, **kwargs):
+        # Instances loaded with a deferred status cannot tell whether it
+        # changed, and saves limited to other fields do not store it.
+        update_fields = kwargs.get('update_fields')
+        tracked = (self._state.adding or hasattr(self, '_loaded_status')) and (
+            update_fields is None or 'status' in update_fields
+        )
+        previous_status = getattr(self, '_loaded_status', None)
+        if not tracked or previous_status == self.status:
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            change = ApplicationStatusChange.record(self, previous_status)
+            application_status_changed.send(
+                sender=self.__class__, instance=self, previous_status=previous_status, change=change,
+            )
+        self._loaded_status = self.status
+
+
+class ApplicationStatusChange(models.Model):
+    """Append-only log of application status transitions"""
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES, blank=True)
+    to_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+    time_in_previous = models.DurationField(null=True, blank=True)  # How long from_status lasted
+
+    partition_field = 'changed_at'
+    objects = TimeRangeQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Application Status Change")
+        verbose_name_plural = _("Application Status Changes")
+        ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['application', 'changed_at']),
+            models.Index(fields=['to_status', 'changed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.from_status or '-'} -> {self.to_status} ({self.changed_at})"
+
+    @classmethod
+    def record(cls, application, previous_status=None, changed_at=None):
+        changed_at = changed_at or timezone.now()
+        last_change = None
+        if previous_status is not None:
+            last_change = cls.objects.filter(application=application).values_list(
+                'changed_at', flat=True,
+            ).order_by('-changed_at').first()
+        return cls.objects.create(
+            application=application,
+            from_status=previous_status or '',
+            to_status=application.status,
+            changed_at=changed_at,
+            time_in_previous=changed_at - last_change if last_change else None,
+        )
+
 
 class JobSearchCriteria(models.Model):
     """Search criteria for job scraping"""
@@ -0,0 +1,331 @@
+"""
+Offline relevance ranking of jobs against a CV.
+
+Each job is turned into a signed feature-hashed TF-IDF vector of
+``JOB_INDEX_DIMENSIONS`` float32 values when it is ingested. Vectors are
+appended to a flat memory-mapped matrix under ``JOB_INDEX_ROOT`` together
+with the matching job ids, so the index survives restarts, is shared
+between processes through the page cache and never has to fit in the heap.
+A query is a chunked matrix-vector product followed by a partial sort.
+
+Every row costs ``4 x JOB_INDEX_DIMENSIONS`` bytes, and fewer dimensions mean
+more unrelated unigrams and bigrams sharing a hashed feature. The default of
+1024 (4 KiB per job, about 4 GB for a million jobs) keeps the matrix in the
+page cache of a small host; 2^14 or more nearly removes collisions for job
+ad vocabularies at 16 times the size. Changing it takes effect at the next
+rebuild, as an existing index keeps the dimensions in its ``meta.json``.
+
+Document frequencies grow with every appended job, but stored rows keep the
+IDF weights they were written with while queries use the current ones, so
+scores drift as the corpus changes. ``rebuild_index`` re-weights every row;
+``rebuild_job_index_task`` runs it daily.
+
+Large indexes also get an inverted-file (IVF) partition at rebuild time:
+rows are assigned to spherical k-means centroids and a query only scans the
+rows of its ``JOB_INDEX_PROBES`` closest centroids, so answering over a
+million jobs touches a few percent of the matrix and takes milliseconds.
+
+Files in the index directory:
+
+* ``vectors.f32`` - row-major ``count x dimensions`` float32 matrix
+* ``ids.i64`` - job id for every row
+* ``df.f64`` - document frequency per hashed feature
+* ``meta.json`` - ``dimensions``, ``count`` and ``documents``
+* ``centroids.f32`` / ``assign.i32`` - optional IVF centroids and row assignments
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+
+from apps.core.lazy import lazy_import
+from apps.core.models import DocumentTemplate
+from apps.core.scheduling import singleton
+from apps.jobs.models import Application, Job
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CHUNK_ROWS = 262144
+KMEANS_SAMPLE_ROWS = 50000
+KMEANS_ITERATIONS = 10
+
+_TOKEN_RE = re.compile(r'[^\W\d_]{2,}|[a-z]+\+\+|c#|\.net', re.IGNORECASE)
+
+STOP_WORDS = frozenset('''
+    and are for from have our the this that with will you your who what
+    als auch auf aus bei das dem den der des die ein eine einer eines für ist
+    mit nicht oder sich sie sind und uns von wir wird zu zum zur über
+'''.split())
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = [token.lower() for token in _TOKEN_RE.findall(text)]
+    return [token for token in tokens if token not in STOP_WORDS]
+
+
+def hashed_counts(text: str, dimensions: int) -> dict[int, float]:
+    """Signed feature hashing of unigrams and bigrams with sublinear TF"""
+    tokens = tokenize(text)
+    features = tokens + [f'{first} {second}' for first, second in zip(tokens, tokens[1:])]
+    counts: dict[int, float] = {}
+    for feature in features:
+        digest = zlib.crc32(feature.encode())
+        index = digest % dimensions
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        counts[index] = counts.get(index, 0.0) + sign
+    return {index: math.copysign(1 + math.log(abs(value)), value)
+            for index, value in counts.items() if value}
+
+
+def train_centroids(sample: np.ndarray, clusters: int, iterations: int = KMEANS_ITERATIONS) -> np.ndarray:
+    """Spherical k-means over L2-normalised rows"""
+    rng = np.random.default_rng(0)
+    centroids = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        for cluster in range(clusters):
+            members = sample[labels == cluster]
+            if len(members):
+                mean = members.sum(axis=0)
+                centroids[cluster] = mean / (np.linalg.norm(mean) or 1)
+    return centroids
+
+
+def job_text(job: Job) -> str:
+    return f'{job.title} {job.title} {job.requirements} {job.description}'
+
+
+def cv_text(application: Optional[Application] = None) -> str:
+    """The application's CV, or the active CV templates when there is none"""
+    if application is not None and application.cv_version:
+        return application.cv_version
+    templates = DocumentTemplate.objects.filter(template_type='cv', is_active=True)
+    return '\n'.join(templates.values_list('content', flat=True))
+
+
+class JobIndex:
+    """Append-only memory-mapped job vector index"""
+
+    def __init__(self, root: Optional[Path] = None, dimensions: Optional[int] = None):
+        self.root = Path(root or settings.JOB_INDEX_ROOT)
+        self.dimensions = dimensions or settings.JOB_INDEX_DIMENSIONS
+        self._loaded_meta_mtime = None
+        self._vectors = None
+        self._ids = None
+        self._df = None
+        self._centroids = None
+        self._assign = None
+        self.count = 0
+        self.documents = 0
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.root / 'meta.json'
+
+    def _refresh(self) -> None:
+        """(Re)open the memory maps when another process changed the index"""
+        try:
+            mtime = self._meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.count, self.documents = 0, 0
+            self._df = np.zeros(self.dimensions)
+            self._vectors = self._ids = self._centroids = self._assign = None
+            return
+        if mtime == self._loaded_meta_mtime:
+            return
+
+        meta = json.loads(self._meta_path.read_text())
+        self.dimensions = meta['dimensions']
+        self.count, self.documents = meta['count'], meta['documents']
+        self._df = np.fromfile(self.root / 'df.f64', dtype=np.float64)
+        if self.count:
+            self._vectors = np.memmap(self.root / 'vectors.f32', dtype=np.float32, mode='r',
+                                      shape=(self.count, self.dimensions))
+            self._ids = np.memmap(self.root / 'ids.i64', dtype=np.int64, mode='r', shape=(self.count,))
+        centroids_path = self.root / 'centroids.f32'
+        if self.count and centroids_path.exists():
+            self._centroids = np.fromfile(centroids_path, dtype=np.float32).reshape(-1, self.dimensions)
+            self._assign = np.memmap(self.root / 'assign.i32', dtype=np.int32, mode='r', shape=(self.count,))
+        else:
+            self._centroids = self._assign = None
+        self._loaded_meta_mtime = mtime
+
+    def _idf(self) -> np.ndarray:
+        return np.log((1 + self.documents) / (1 + self._df)) + 1
+
+    def vectorize(self, texts: list[str]) -> np.ndarray:
+        """TF-IDF weighted, L2-normalised float32 rows for ``texts``"""
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, value in hashed_counts(text, self.dimensions).items():
+                matrix[row, index] = value
+        matrix *= self._idf().astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _write_meta(self) -> None:
+        self._df.tofile(self.root / 'df.f64')
+        tmp_path = self._meta_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({
+            'dimensions': self.dimensions, 'count': self.count, 'documents': self.documents,
+        }))
+        os.replace(tmp_path, self._meta_path)
+
+    def add(self, jobs: Iterable[Job], update_df: bool = True) -> int:
+        """Append vectors for ``jobs``; the caller must hold the index lock"""
+        jobs = list(jobs)
+        if not jobs:
+            return 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._refresh()
+
+        texts = [job_text(job) for job in jobs]
+        if update_df:
+            for text in texts:
+                for index in hashed_counts(text, self.dimensions):
+                    self._df[index] += 1
+            self.documents += len(jobs)
+        matrix = self.vectorize(texts)
+
+        with open(self.root / 'vectors.f32', 'ab') as vectors, open(self.root / 'ids.i64', 'ab') as ids:
+            vectors.write(matrix.tobytes())
+            ids.write(np.array([job.pk for job in jobs], dtype=np.int64).tobytes())
+        if self._centroids is not None:
+            with open(self.root / 'assign.i32', 'ab') as assign:
+                assign.write(self._nearest_centroids(matrix).tobytes())
+        self.count += len(jobs)
+        self._write_meta()
+        return len(jobs)
+
+    def _nearest_centroids(self, matrix: np.ndarray) -> np.ndarray:
+        return np.argmax(matrix @ self._centroids.T, axis=1).astype(np.int32)
+
+    def build_partitions(self, clusters: Optional[int] = None) -> None:
+        """Train IVF centroids on a sample and assign every row; needs the index lock"""
+        self._refresh()
+        clusters = min(clusters or int(math.sqrt(self.count)), self.count)
+        sample_rows = np.sort(np.random.default_rng(0).choice(
+            self.count, min(self.count, KMEANS_SAMPLE_ROWS), replace=False,
+        ))
+        self._centroids = train_centroids(np.asarray(self._vectors[sample_rows]), clusters)
+        self._centroids.tofile(self.root / 'centroids.f32')
+        with open(self.root / 'assign.i32', 'wb') as assign:
+            for start in range(0, self.count, SEARCH_CHUNK_ROWS):
+                assign.write(self._nearest_centroids(self._vectors[start:start + SEARCH_CHUNK_ROWS]).tobytes())
+        self._write_meta()
+
+    def _candidate_rows(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if self._centroids is None:
+            return None
+        probes = np.argsort(-(self._centroids @ query))[:settings.JOB_INDEX_PROBES]
+        return np.flatnonzero(np.isin(self._assign, probes))
+
+    def search(self, text: str, k: int = 20) -> list[tuple[int, float]]:
+        """Return ``(job_id, cosine similarity)`` of the ``k`` closest jobs"""
+        self._refresh()
+        if not self.count:
+            return []
+        query = self.vectorize([text])[0]
+        candidates = self._candidate_rows(query)
+        total = self.count if candidates is None else len(candidates)
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+
+        for start in range(0, total, SEARCH_CHUNK_ROWS):
+            if candidates is None:
+                rows = np.arange(start, min(start + SEARCH_CHUNK_ROWS, total))
+                scores = self._vectors[start:start + SEARCH_CHUNK_ROWS] @ query
+            else:
+                rows = candidates[start:start + SEARCH_CHUNK_ROWS]
+                scores = self._vectors[rows] @ query
+            if len(scores) > k:
+                top = np.argpartition(scores, -k)[-k:]
+            else:
+                top = np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, rows[top]])
+            if len(best_scores) > k:
+                keep = np.argpartition(best_scores, -k)[-k:]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        order = np.argsort(-best_scores)
+        return [(int(self._ids[best_rows[i]]), float(best_scores[i])) for i in order]
+
+
+_index: Optional[JobIndex] = None
+
+
+def get_index() -> JobIndex:
+    global _index
+    if _index is None:
+        _index = JobIndex()
+    return _index
+
+
+def index_jobs(jobs: Iterable[Job]) -> int:
+    """Add freshly ingested jobs to the shared index"""
+    with singleton('job-index', timeout=300, wait=60) as acquired:
+        if not acquired:
+            logger.warning("Job index lock busy, jobs will be picked up by the next rebuild")
+            return 0
+        return get_index().add(jobs)
+
+
+def rank_jobs(text: str, k: int = 20) -> list[tuple[Job, float]]:
+    """Jobs most similar to ``text``, best first, skipping deleted jobs"""
+    hits = get_index().search(text, k=k * 2)
+    jobs = Job.objects.select_related('platform').in_bulk([job_id for job_id, _ in hits])
+    return [(jobs[job_id], score) for job_id, score in hits if job_id in jobs][:k]
+
+
+def rebuild_index(batch_size: int = 2000) -> int:
+    """Rebuild the index from all jobs into a fresh directory, then swap it in"""
+    root = Path(settings.JOB_INDEX_ROOT)
+    staging = root.with_name(root.name + '.new')
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    index = JobIndex(root=staging)
+    index._refresh()
+    queryset = Job.objects.only('pk', 'title', 'description', 'requirements').order_by('pk')
+    for job in queryset.iterator(chunk_size=batch_size):
+        for feature in hashed_counts(job_text(job), index.dimensions):
+            index._df[feature] += 1
+        index.documents += 1
+    index._write_meta()
+
+    last_pk = 0
+    batch = []
+    for job in queryset.iterator(chunk_size=batch_size):
+        last_pk = job.pk
+        batch.append(job)
+        if len(batch) == batch_size:
+            index.add(batch, update_df=False)
+            batch = []
+    index.add(batch, update_df=False)
+    if index.count >= settings.JOB_INDEX_IVF_MIN_ROWS:
+        index.build_partitions()
+
+    with singleton('job-index', timeout=300, wait=60):
+        previous = root.with_name(root.name + '.old')
+        # Left behind by an interrupted swap; os.replace cannot overwrite a non-empty directory.
+        shutil.rmtree(previous, ignore_errors=True)
+        if root.exists():
+            os.replace(root, previous)
+        os.replace(staging, root)
+        shutil.rmtree(previous, ignore_errors=True)
+        # Jobs ingested while the rebuild ran were appended to the old index.
+        added = get_index().add(Job.objects.filter(pk__gt=last_pk).order_by('pk'))
+    return index.count + added
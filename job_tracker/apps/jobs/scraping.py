@@ -0,0 +1,65 @@
+"""Fetch postings for one search on one platform"""
+import logging
+
+from django.conf import settings
+
+from apps.core.lazy import lazy_import
+from apps.core.models import JobPlatform
+from apps.dashboard import events
+from apps.jobs import extractors, fetching
+from apps.jobs.ingest import ingest_postings
+from apps.jobs.models import Job, JobSearchCriteria
+from apps.jobs.ranking import index_jobs
+
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_postings(criteria: JobSearchCriteria, platform: JobPlatform) -> list[dict]:
+    """Query the platform's search API for ``criteria``"""
+    params = {'keywords': criteria.keywords, 'location': criteria.location}
+    if criteria.salary_min is not None:
+        params['salary_min'] = str(criteria.salary_min)
+    response = requests.get(
+        platform.api_endpoint,
+        params=params,
+        headers={'Authorization': f'Bearer {platform.api_key}'},
+        timeout=settings.SCRAPE_REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    payload = response.json()
+    return payload.get('results', []) if isinstance(payload, dict) else payload
+
+
+def scrape_board(criteria: JobSearchCriteria, platform: JobPlatform) -> list[dict]:
+    """Fetch the first result pages of a job board and extract their postings"""
+    pages = []
+    for number in range(1, settings.SCRAPE_RESULT_PAGES + 1):
+        page = fetching.fetch_page(platform.name, fetching.search_url(criteria, platform, number))
+        if page.empty:
+            break
+        pages.append((platform.name, page.content, page.url))
+    return [extractors.to_posting(record) for records in extractors.parse_pages(pages) for record in records]
+
+
+def scrape(criteria: JobSearchCriteria, platform: JobPlatform) -> list[Job]:
+    """Fetch and store new postings, returning the jobs that were created"""
+    if platform.name in extractors.SPECS:
+        postings = scrape_board(criteria, platform)
+    else:
+        postings = fetch_postings(criteria, platform)
+    jobs = ingest_postings(platform, postings)
+    index_jobs(jobs)
+    if jobs:
+        events.publish('jobs_matched', {
+            'criteria': criteria.name,
+            'platform': platform.name,
+            'count': len(jobs),
+            'jobs': [
+                {'id': job.pk, 'title': job.title, 'company': job.company, 'location': job.location}
+                for job in jobs[:settings.DASHBOARD_EVENTS_MAX_ITEMS]
+            ],
+        })
+    logger.info("Scraped %s on %s: %d new jobs", criteria.name, platform.name, len(jobs))
+    return jobs
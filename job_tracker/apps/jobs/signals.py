@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent after an Application is saved with a different status, inside the
+# transaction that stored it and its ApplicationStatusChange.
+# Arguments: instance, previous_status, change
+application_status_changed = Signal()
@@ -0,0 +1,95 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.lazy import lazy_import
+from apps.core.models import JobPlatform
+from apps.core.redis_client import get_redis
+from apps.core.scheduling import next_poll_interval, singleton
+from apps.jobs import ranking, scraping
+from apps.jobs.browser import PoolExhausted
+from apps.jobs.models import JobSearchCriteria
+
+requests = lazy_import('requests')
+selenium_exceptions = lazy_import('selenium.common.exceptions')
+
+logger = logging.getLogger(__name__)
+
+
+def _new_postings_key(platform_id: int) -> str:
+    return f'scrape:new_postings:{platform_id}'
+
+
+def _priority(interval: int) -> int:
+    """Map shorter polling intervals to higher (lower numbered) priorities"""
+    span = max(settings.SCRAPE_MAX_INTERVAL - settings.SCRAPE_MIN_INTERVAL, 1)
+    return round(9 * (interval - settings.SCRAPE_MIN_INTERVAL) / span)
+
+
+@shared_task
+def scrape_jobs_task():
+    """Fan out one scrape per (criteria, platform) for platforms that are due"""
+    with singleton('scrape-dispatch', timeout=settings.SCRAPE_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Scrape dispatch already running, skipping")
+            return
+
+        now = timezone.now()
+        due = JobPlatform.objects.filter(is_active=True).filter(
+            Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=now)
+        )
+        for platform in due:
+            new_postings = int(get_redis().getdel(_new_postings_key(platform.pk)) or 0)
+            if platform.next_poll_at is not None:
+                platform.poll_interval = next_poll_interval(
+                    platform.poll_interval, new_postings,
+                    settings.SCRAPE_MIN_INTERVAL, settings.SCRAPE_MAX_INTERVAL,
+                )
+            platform.next_poll_at = now + timedelta(seconds=platform.poll_interval)
+            platform.save(update_fields=['poll_interval', 'next_poll_at'])
+
+            criteria_ids = JobSearchCriteria.objects.filter(
+                is_active=True, platforms=platform,
+            ).values_list('pk', flat=True)
+            for criteria_id in criteria_ids:
+                scrape_platform_task.apply_async(
+                    (criteria_id, platform.pk), priority=_priority(platform.poll_interval),
+                )
+            logger.info(
+                "Dispatched %d scrapes on %s, next poll in %ds",
+                len(criteria_ids), platform.name, platform.poll_interval,
+            )
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def scrape_platform_task(self, criteria_id, platform_id):
+    """Scrape one search on one platform unless the same scrape is in flight"""
+    with singleton(f'scrape:{criteria_id}:{platform_id}', timeout=settings.SCRAPE_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Scrape %s/%s already in flight, skipping", criteria_id, platform_id)
+            return 0
+
+        criteria = JobSearchCriteria.objects.get(pk=criteria_id)
+        platform = JobPlatform.objects.get(pk=platform_id)
+        try:
+            jobs = scraping.scrape(criteria, platform)
+        except (requests.RequestException, selenium_exceptions.TimeoutException, PoolExhausted) as exc:
+            # Network errors, pages that never rendered and a saturated browser pool are transient.
+            raise self.retry(exc=exc, countdown=60 * 2 ** self.request.retries)
+
+        get_redis().incrby(_new_postings_key(platform_id), len(jobs))
+        return len(jobs)
+
+
+@shared_task
+def rebuild_job_index_task():
+    """Rebuild the job relevance index so stored vectors use current IDF weights"""
+    with singleton('job-index-rebuild', timeout=settings.JOB_INDEX_REBUILD_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Job index rebuild already in flight, skipping")
+            return 0
+        return ranking.rebuild_index()
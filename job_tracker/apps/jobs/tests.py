@@ -1,3 +1,336 @@
-from django.test import TestCase
+import multiprocessing
+import shutil
+import tempfile
+from decimal import Decimal
+import threading
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.factories import JobPlatformFactory
+from apps.jobs import companies, extractors, fetching, ranking, scraping
+from apps.jobs.benchmarks import PAGES_DIR
+from apps.jobs.ingest import salary_bounds
+from apps.jobs.factories import ApplicationFactory, CompanyFactory, JobFactory
+from apps.jobs.models import Application, ApplicationStatusChange, Company, JobSearchCriteria
+
+
+@contextmanager
+def _acquired(name, timeout, wait=0):
+    yield True
+
+
+class RankingTestCase(TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.python = JobFactory(title='Python Developer', requirements='Python, Django, PostgreSQL',
+                                 description='Build Django services on PostgreSQL.')
+        self.frontend = JobFactory(title='Frontend Engineer', requirements='React, TypeScript',
+                                   description='Ship React interfaces in TypeScript.')
+        self.sales = JobFactory(title='Account Manager', requirements='Negotiation, CRM',
+                                description='Grow enterprise accounts and manage the sales pipeline.')
+
+
+class JobIndexTests(RankingTestCase):
+    def test_add_and_search(self):
+        index = ranking.JobIndex(root=self.root / 'jobs', dimensions=1024)
+        self.assertEqual(index.add([self.python, self.frontend, self.sales]), 3)
+
+        hits = index.search('Senior Python and Django developer, PostgreSQL experience', k=2)
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(hits[0][0], self.python.pk)
+        self.assertGreater(hits[0][1], hits[1][1])
+
+    def test_other_instances_see_appended_rows(self):
+        writer = ranking.JobIndex(root=self.root / 'jobs', dimensions=1024)
+        reader = ranking.JobIndex(root=self.root / 'jobs', dimensions=1024)
+        writer.add([self.python])
+        self.assertEqual(reader.search('python', k=5)[0][0], self.python.pk)
+        writer.add([self.frontend])
+        self.assertEqual({job_id for job_id, _ in reader.search('react typescript', k=5)},
+                         {self.python.pk, self.frontend.pk})
+
+    def test_empty_index_returns_nothing(self):
+        self.assertEqual(ranking.JobIndex(root=self.root / 'missing', dimensions=64).search('python'), [])
+
+
+@mock.patch('apps.jobs.ranking.singleton', _acquired)
+class RebuildIndexTests(RankingTestCase):
+    def setUp(self):
+        super().setUp()
+        ranking._index = None
+        self.addCleanup(setattr, ranking, '_index', None)
+
+    def test_rebuild_replaces_index_despite_leftover_old_directory(self):
+        root = self.root / 'jobs'
+        with override_settings(JOB_INDEX_ROOT=str(root), JOB_INDEX_DIMENSIONS=1024, JOB_INDEX_IVF_MIN_ROWS=100):
+            (self.root / 'jobs.old').mkdir()
+            (self.root / 'jobs.old' / 'vectors.f32').write_bytes(b'stale')
+            self.assertEqual(ranking.rebuild_index(), 3)
+            self.assertEqual(ranking.rebuild_index(), 3)
+            self.assertFalse((self.root / 'jobs.old').exists())
+            self.assertFalse((self.root / 'jobs.new').exists())
+            ranked = ranking.rank_jobs('React and TypeScript frontend', k=1)
+        self.assertEqual(ranked[0][0], self.frontend)
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Serves ``fixtures/pages``; a board's second result page reports no results"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = url.path.strip('/')
+        if parse_qs(url.query).get('page') == ['2']:
+            path = PAGES_DIR / 'states' / f'{name}-empty.html'
+        elif (PAGES_DIR / f'{name}.html').exists():
+            path = PAGES_DIR / f'{name}.html'
+        else:
+            path = PAGES_DIR / 'states' / f'{name}.html'
+        if not path.exists():
+            self.send_error(404)
+            return
+        body = path.read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+
+@mock.patch('apps.jobs.fetching._fetch_browser')
+class FetchPageTests(FixtureServerMixin, SimpleTestCase):
+    def test_server_rendered_listings_use_http(self, fetch_browser):
+        for name in ('stepstone', 'indeed', 'linkedin'):
+            with self.subTest(board=name):
+                page = fetching.fetch_page(name, f'{self.base_url}/{name}')
+                self.assertEqual(page.via, 'http')
+                self.assertFalse(page.empty)
+        fetch_browser.assert_not_called()
+
+    def test_no_results_page_is_accepted_without_browser(self, fetch_browser):
+        page = fetching.fetch_page('indeed', f'{self.base_url}/indeed-empty')
+        self.assertEqual((page.via, page.empty), ('http', True))
+        fetch_browser.assert_not_called()
+
+    def test_pages_without_listing_fall_back_to_browser(self, fetch_browser):
+        # The XING fixture renders its results from embedded JSON.
+        fetch_browser.return_value = b'<html><body><article data-testid="job-search-result"></article></body></html>'
+        page = fetching.fetch_page('xing', f'{self.base_url}/xing')
+        self.assertEqual((page.via, page.empty), ('browser', False))
+        fetch_browser.assert_called_once()
+
+    def test_missing_pages_fall_back_to_browser(self, fetch_browser):
+        fetch_browser.return_value = (PAGES_DIR / 'states' / 'stepstone-empty.html').read_bytes()
+        page = fetching.fetch_page('stepstone', f'{self.base_url}/missing')
+        self.assertEqual((page.via, page.empty), ('browser', True))
+
+
+@override_settings(SCRAPE_RESULT_PAGES=3, SCRAPE_PARSE_WORKERS=0)
+class HttpSessionTests(SimpleTestCase):
+    def test_each_thread_gets_its_own_session(self):
+        sessions = [fetching._http_session()]
+        thread = threading.Thread(target=lambda: sessions.append(fetching._http_session()))
+        thread.start()
+        thread.join()
+        self.assertIs(fetching._http_session(), sessions[0])
+        self.assertIsNot(sessions[0], sessions[1])
+
+
+class ScrapeBoardTests(FixtureServerMixin, TestCase):
+    def test_stops_at_first_empty_page(self):
+        platform = JobPlatformFactory(name='stepstone', api_endpoint=f'{self.base_url}/stepstone')
+        criteria = JobSearchCriteria.objects.create(name='Python', keywords='python', location='Berlin')
+        with mock.patch('apps.jobs.fetching._fetch_browser') as fetch_browser, \
+                mock.patch('apps.jobs.scraping.fetching.fetch_page', wraps=fetching.fetch_page) as fetch_page:
+            postings = scraping.scrape_board(criteria, platform)
+        fetch_browser.assert_not_called()
+        self.assertEqual(fetch_page.call_count, 2)
+        self.assertEqual(len(postings), 20)
+
+
+def _fixture_pages(copies: int = 1) -> list[tuple[str, bytes, str]]:
+    return [
+        (name, (PAGES_DIR / f'{name}.html').read_bytes(), f'https://{name}.example/search')
+        for name in ('stepstone', 'indeed', 'linkedin')
+    ] * copies
+
+
+class ExtractTests(SimpleTestCase):
+    def test_extracts_fixture_pages(self):
+        stepstone, indeed, linkedin = [extractors.extract(*page) for page in _fixture_pages()]
+        self.assertEqual((len(stepstone), len(indeed), len(linkedin)), (20, 20, 20))
+        self.assertEqual(extractors.to_posting(stepstone[0]), {
+            'url': 'https://stepstone.example/stellenangebote--30246633.html',
+            'external_id': '30246633',
+            'title': 'Senior Python Entwickler (m/w/d)',
+            'company': 'Müller & Söhne GmbH',
+            'location': 'Berlin',
+            'salary_range': '65.000 € - 80.000 €',
+            'description': 'Wir suchen Verstärkung für unser Team. Sie entwickeln skalierbare Services '
+                           'und arbeiten eng mit Produkt und Design zusammen.',
+            'requirements': 'React, Java, Python, Django',
+            'posted_date': '2026-10-01T08:00:00Z',
+        })
+        self.assertEqual(indeed[0][0], 'https://indeed.example/viewjob?jk=27359750')
+        self.assertEqual(linkedin[0][4], 'Berlin, Deutschland')
+
+    def test_client_rendered_page_has_no_records(self):
+        self.assertEqual(extractors.extract('xing', (PAGES_DIR / 'xing.html').read_bytes(), 'https://xing.example'), [])
+        self.assertEqual(extractors.extract('xing', b'', 'https://xing.example'), [])
+
+
+def _parse_in_daemon(queue, pretend_not_daemon: bool) -> None:
+    with mock.patch.object(extractors, '_is_daemon', return_value=False) if pretend_not_daemon else nullcontext():
+        try:
+            queue.put([len(records) for records in extractors.parse_pages(_fixture_pages())])
+        except BaseException as exc:
+            queue.put(repr(exc))
+
+
+@override_settings(SCRAPE_PARSE_WORKERS=2)
+class ParsePagesTests(SimpleTestCase):
+    def run_in_daemon(self, pretend_not_daemon: bool = False):
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        process = context.Process(target=_parse_in_daemon, args=(queue, pretend_not_daemon), daemon=True)
+        process.start()
+        result = queue.get(timeout=30)
+        process.join(timeout=30)
+        return result
+
+    def test_parses_in_pool(self):
+        self.assertEqual([len(records) for records in extractors.parse_pages(_fixture_pages(2))], [20] * 6)
+
+    def test_daemonic_process_parses_in_process(self):
+        self.assertEqual(self.run_in_daemon(), [20, 20, 20])
+
+    def test_falls_back_when_workers_cannot_start(self):
+        self.assertEqual(self.run_in_daemon(pretend_not_daemon=True), [20, 20, 20])
+
+
+class SalaryBoundsTests(SimpleTestCase):
+    def test_board_formats(self):
+        cases = {
+            '65.000 € - 80.000 €': (65000, 80000),
+            '€70K - €90K': (70000, 90000),
+            '70-90k €': (70000, 90000),
+            '€72.5k': (72500, 72500),
+            'EUR 65,000 - 75,000 per year': (65000, 75000),
+            '70 000 - 85 000 EUR': (70000, 85000),
+            '40 Stunden/Woche, 55k EUR': (55000, 55000),
+        }
+        for text, (low, high) in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(salary_bounds(text), (Decimal(low), Decimal(high)))
+
+    def test_no_amount(self):
+        self.assertEqual(salary_bounds('Attraktive Vergütung'), (None, None))
+        self.assertEqual(salary_bounds(''), (None, None))
+
+
+class ApplicationStatusTests(TestCase):
+    def test_save_logs_transitions(self):
+        application = ApplicationFactory(status='not_applied')
+        application.status = 'applied'
+        application.save()
+        application.notes = 'Sent by email'
+        application.save()
+        self.assertEqual(
+            list(application.status_changes.order_by('changed_at', 'pk').values_list('from_status', 'to_status')),
+            [('', 'not_applied'), ('not_applied', 'applied')],
+        )
+
+    def test_refreshed_instance_does_not_log_twice(self):
+        application = ApplicationFactory(status='applied')
+        Application.objects.filter(pk=application.pk).set_status('interviewed')
+        application.refresh_from_db()
+        application.notes = 'Follow up'
+        application.save()
+        self.assertEqual(application.status_changes.filter(to_status='interviewed').count(), 1)
+
+    def test_save_of_other_fields_does_not_log(self):
+        application = ApplicationFactory(status='applied')
+        application.status = 'rejected'
+        application.notes = 'Status not confirmed yet'
+        application.save(update_fields=['notes'])
+        self.assertFalse(application.status_changes.filter(to_status='rejected').exists())
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'applied')
+
+    def test_set_status_logs_each_changed_application(self):
+        applications = ApplicationFactory.create_batch(3, status='applied')
+        applications[0].status = 'rejected'
+        applications[0].save()
+        self.assertEqual(Application.objects.all().set_status('rejected'), 2)
+        self.assertEqual(ApplicationStatusChange.objects.filter(to_status='rejected').count(), 3)
+        self.assertFalse(Application.objects.exclude(status='rejected').exists())
+
+    def test_bulk_status_writes_are_refused(self):
+        application = ApplicationFactory(status='applied')
+        with self.assertRaises(ValueError):
+            Application.objects.update(status='rejected')
+        with self.assertRaises(ValueError):
+            Application.objects.bulk_update([application], ['status'])
+        self.assertEqual(Application.objects.update(notes='checked'), 1)
+
+
+@override_settings(COMPANY_MATCH_CUTOFF=0.9)
+class ResolveCompaniesTests(TestCase):
+    def test_canonical_name_keeps_legal_form(self):
+        self.assertEqual(companies.canonical_name('Müller & Söhne GmbH.'), 'mueller soehne gmbh')
+        self.assertEqual(companies.split_legal_form('mueller soehne gmbh co kg'), ('mueller soehne', 'gmbh co kg'))
+        self.assertEqual(companies.split_legal_form('gmbh'), ('gmbh', ''))
+
+    def test_spelling_variants_share_a_company(self):
+        existing = CompanyFactory(name='Müller & Söhne GmbH')
+        resolved = companies.resolve(['Mueller und Soehne GmbH', 'Müller Söhne', 'Mueller & Sohne GmbH', ''])
+        self.assertEqual(set(resolved), {'Mueller und Soehne GmbH', 'Müller Söhne', 'Mueller & Sohne GmbH'})
+        self.assertEqual({company.pk for company in resolved.values()}, {existing.pk})
+        self.assertEqual(Company.objects.count(), 1)
+
+    def test_different_legal_forms_stay_apart(self):
+        gmbh = CompanyFactory(name='Siemens Energy GmbH')
+        resolved = companies.resolve(['Siemens Energy AG', 'Siemens Enrgy GmbH'])
+        self.assertNotEqual(resolved['Siemens Energy AG'].pk, gmbh.pk)
+        self.assertEqual(resolved['Siemens Enrgy GmbH'].pk, gmbh.pk)
+
+    def test_new_names_in_one_batch_are_merged(self):
+        resolved = companies.resolve(['Acme Analytics', 'ACME Analytics GmbH', 'Acme Analytic'])
+        self.assertEqual(len({company.pk for company in resolved.values()}), 1)
+        self.assertEqual(Company.objects.get().name, 'Acme Analytics')
+
+    def test_short_names_resolve(self):
+        sap = CompanyFactory(name='SAP SE')
+        resolved = companies.resolve(['SAP', 'IBM', 'SAP SE'])
+        self.assertEqual(resolved['SAP'].pk, sap.pk)
+        self.assertEqual(resolved['SAP SE'].pk, sap.pk)
+        self.assertEqual(resolved['IBM'].canonical_name, 'ibm')
+
+    def test_query_count_does_not_grow_with_batch(self):
+        CompanyFactory.create_batch(20)
+        names = [f'Company {index} GmbH' for index in range(50)]
+        with self.assertNumQueries(4):
+            companies.resolve(names)
@@ -4,6 +4,12 @@ from celery import Celery
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'job_tracker.settings')
 
+from celery.signals import worker_process_shutdown  # noqa: E402
+
+from apps.core import usage  # noqa: E402
+from apps.core.instrumentation import connect_task_signals  # noqa: E402
+from apps.jobs.browser import close_pool  # noqa: E402
+
 app = Celery('job_tracker')
 
 # Using a string here means the worker doesn't have to serialize
@@ -13,6 +19,14 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Record per-task query count, DB time and N+1 patterns.
+connect_task_signals()
+
+# Prefork children skip atexit handlers, so release their browsers and push
+# their usage counters explicitly.
+worker_process_shutdown.connect(close_pool, weak=False)
+worker_process_shutdown.connect(usage.push, weak=False)
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
@@ -4,7 +4,7 @@ Django settings for job_tracker project.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.instrumentation.QueryInstrumentationMiddleware',
+    'apps.core.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -86,9 +88,41 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),  # Persistent connections
+        'CONN_HEALTH_CHECKS': True,
+        # Set when connecting through PgBouncer in transaction pooling mode.
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_TRANSACTION_POOLING', default=False, cast=bool),
+        'OPTIONS': {'connect_timeout': 5},
     }
 }
 
+# Read replicas as host:port pairs, e.g. DB_REPLICA_HOSTS=localhost:5433 for a
+# second local instance. See apps.core.routers for what is read from them.
+DATABASE_REPLICAS = []
+for _index, _address in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    _host, _, _port = _address.partition(':')
+    DATABASES[f'replica{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        # Health probes run on the request path; fail fast while a replica is down.
+        'OPTIONS': {'connect_timeout': config('DB_REPLICA_CONNECT_TIMEOUT', default=1, cast=int)},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{_index}')
+
+DATABASE_ROUTERS = ['apps.core.routers.ReplicaRouter']
+REPLICA_READ_PATHS = [
+    r'^/api/',  # API reads; non-safe methods always use the primary
+    r'^/admin/\w+/\w+/$',  # Admin changelists
+    r'^/(usage|funnel)/',  # Dashboard analytics
+    r'/export',
+]
+REPLICA_STICKY_COOKIE = 'db_primary'
+REPLICA_STICKY_SECONDS = 10  # Read from the primary this long after a write
+REPLICA_HEALTH_INTERVAL = 5  # Seconds between replica probes
+REPLICA_MAX_LAG = config('DB_REPLICA_MAX_LAG', default=5, cast=int)  # Seconds
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -165,25 +199,53 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_ROUTES = {
+    'apps.jobs.tasks.scrape_platform_task': {'queue': 'scrape'},
+    'apps.integrations.tasks.sync_email_account_task': {'queue': 'email'},
+    'apps.integrations.tasks.refresh_company_ratings_task': {'queue': 'scrape'},
+}
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
 
 # Celery Beat Schedule
 CELERY_BEAT_SCHEDULE = {
     'scrape-jobs': {
         'task': 'apps.jobs.tasks.scrape_jobs_task',
-        'schedule': 3600.0,  # Every hour
+        'schedule': 300.0,  # Dispatches platforms whose adaptive interval is due
     },
     'sync-emails': {
         'task': 'apps.integrations.tasks.sync_emails_task',
         'schedule': 300.0,  # Every 5 minutes
     },
+    'rebuild-job-index': {
+        'task': 'apps.jobs.tasks.rebuild_job_index_task',
+        'schedule': 86400.0,  # Daily, refreshes the IDF weights of stored vectors
+    },
     'generate-market-insights': {
         'task': 'apps.core.tasks.generate_market_insights_task',
         'schedule': 86400.0,  # Daily
     },
+    'maintain-partitions': {
+        'task': 'apps.core.tasks.maintain_partitions_task',
+        'schedule': 86400.0,  # Daily
+    },
+    'refresh-company-ratings': {
+        'task': 'apps.integrations.tasks.refresh_company_ratings_task',
+        'schedule': 3600.0,  # Hourly, one rate-limited batch
+    },
+    'flush-usage': {
+        'task': 'apps.core.tasks.flush_usage_task',
+        'schedule': 60.0,  # Every minute
+    },
 }
 
 # Redis Configuration
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+REDIS_SOCKET_TIMEOUT = config('REDIS_SOCKET_TIMEOUT', default=1.0, cast=float)
+REDIS_CONNECT_TIMEOUT = config('REDIS_CONNECT_TIMEOUT', default=0.5, cast=float)
 
 # OpenAI Configuration
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
@@ -203,6 +265,7 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 # Google APIs
 GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
 GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET', default='')
+GOOGLE_SERVICE_CACHE_SIZE = 16  # Built API services kept per thread
 
 # Logging Configuration
 LOGGING = {
@@ -228,6 +291,78 @@ LOGGING = {
     },
 }
 
+# Query and latency instrumentation
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=1000, cast=int)
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=10, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_RETRY_SECONDS = config('METRICS_RETRY_SECONDS', default=30, cast=int)
+
+# Scrape and email sync scheduling (seconds)
+SCRAPE_MIN_INTERVAL = config('SCRAPE_MIN_INTERVAL', default=900, cast=int)
+SCRAPE_MAX_INTERVAL = config('SCRAPE_MAX_INTERVAL', default=6 * 3600, cast=int)
+SCRAPE_LOCK_TIMEOUT = 30 * 60
+SCRAPE_REQUEST_TIMEOUT = 30
+SCRAPE_HTTP_POOL_SIZE = 20
+SCRAPE_BROWSER_POOL_SIZE = config('SCRAPE_BROWSER_POOL_SIZE', default=1, cast=int)  # Per worker process
+SCRAPE_BROWSER_MAX_PAGES = config('SCRAPE_BROWSER_MAX_PAGES', default=50, cast=int)
+SCRAPE_BROWSER_MAX_RSS_MB = config('SCRAPE_BROWSER_MAX_RSS_MB', default=800, cast=int)
+SCRAPE_BROWSER_WAIT = 120  # Seconds to wait for a free browser session
+SCRAPE_RESULT_PAGES = config('SCRAPE_RESULT_PAGES', default=3, cast=int)
+SCRAPE_PARSE_WORKERS = config('SCRAPE_PARSE_WORKERS', default=2, cast=int)  # 0 parses in-process
+EMAIL_SYNC_LOCK_TIMEOUT = 10 * 60
+EMAIL_SYNC_INITIAL_DAYS = 14
+EMAIL_SYNC_IMAP_TIMEOUT = config('EMAIL_SYNC_IMAP_TIMEOUT', default=30, cast=int)
+
+# Job relevance index
+JOB_INDEX_ROOT = config('JOB_INDEX_ROOT', default=str(BASE_DIR / 'index' / 'jobs'))
+JOB_INDEX_DIMENSIONS = config('JOB_INDEX_DIMENSIONS', default=1024, cast=int)  # Size vs. collisions, see apps.jobs.ranking
+JOB_INDEX_IVF_MIN_ROWS = 50000
+JOB_INDEX_PROBES = config('JOB_INDEX_PROBES', default=16, cast=int)
+JOB_INDEX_REBUILD_LOCK_TIMEOUT = 2 * 60 * 60
+
+# Startup budget checked by 'manage.py import_report'
+STARTUP_IMPORT_BUDGET_MS = config('STARTUP_IMPORT_BUDGET_MS', default=2000, cast=int)
+STARTUP_RSS_BUDGET_MB = config('STARTUP_RSS_BUDGET_MB', default=150, cast=int)
+
+# Live dashboard updates (Server-Sent Events over the ASGI app)
+DASHBOARD_EVENTS_KEEPALIVE = 15  # Seconds between keep-alive comments
+DASHBOARD_EVENTS_MAX_AGE = 5 * 60  # Seconds before a stream is closed and the browser reconnects
+DASHBOARD_EVENTS_MAX_ITEMS = 10  # Items included in one delta
+
+# Company canonicalization and Glassdoor rating cache
+COMPANY_MATCH_CUTOFF = 0.9  # difflib ratio above which two names are one company
+COMPANY_RATING_TTL_DAYS = config('COMPANY_RATING_TTL_DAYS', default=30, cast=int)
+GLASSDOOR_REQUESTS_PER_MINUTE = config('GLASSDOOR_REQUESTS_PER_MINUTE', default=30, cast=int)
+GLASSDOOR_BATCH_SIZE = 500
+GLASSDOOR_LOCK_TIMEOUT = 60 * 60
+
+# Usage accounting and spending limits for paid APIs (USD, 0 disables a limit).
+# A limit only applies where the client calls usage.check_budget before each
+# request, which today is apps.documents.ai.complete for 'openai'.
+USAGE_PUSH_INTERVAL = 5  # Max seconds counters stay in process memory before reaching Redis
+USAGE_BUDGET_REFRESH = 10  # Seconds a process reuses its last spend reading
+USAGE_BUDGETS = {
+    'openai': {
+        'daily': config('OPENAI_DAILY_BUDGET', default=20.0, cast=float),
+        'monthly': config('OPENAI_MONTHLY_BUDGET', default=200.0, cast=float),
+    },
+}
+
+# Time-partitioned storage and archival
+PARTITION_RETENTION_MONTHS = {
+    'integrations.Email': config('EMAIL_RETENTION_MONTHS', default=24, cast=int),
+    'documents.AIGenerationLog': config('AI_LOG_RETENTION_MONTHS', default=12, cast=int),
+    'core.TranslationUsage': config('TRANSLATION_USAGE_RETENTION_MONTHS', default=24, cast=int),
+}
+PARTITION_MONTHS_AHEAD = 3
+JOB_RETENTION_MONTHS = config('JOB_RETENTION_MONTHS', default=12, cast=int)
+ARCHIVE_ROOT = config('ARCHIVE_ROOT', default=str(BASE_DIR / 'archive'))
+ARCHIVE_BATCH_SIZE = 10000
+
+# Local performance benchmarks
+BENCHMARK_BASELINE_PATH = config('BENCHMARK_BASELINE_PATH', default=str(BASE_DIR / 'benchmarks' / 'baselines.json'))
+BENCHMARK_REGRESSION_THRESHOLD = config('BENCHMARK_REGRESSION_THRESHOLD', default=0.2, cast=float)
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -6,8 +6,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.core.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('', include('apps.dashboard.urls')),
     path('jobs/', include('apps.jobs.urls')),
     path('documents/', include('apps.documents.urls')),